@@ -0,0 +1,280 @@
+import ipaddress
+import os
+import platform
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+
+IP_PATTERN = re.compile(r'\b(?:\d{1,3}\.){3}\d{1,3}\b|(?:[0-9a-fA-F]{0,4}:){2,7}[0-9a-fA-F]{1,4}')
+
+# get_dns 返回的DNS来源
+SOURCE_DHCP = 'dhcp'
+SOURCE_STATIC = 'static'
+
+
+class DNSBackendError(Exception):
+    """查询或修改DNS失败"""
+
+
+class DNSBackend:
+    """操作系统DNS配置接口
+
+    set_dns 传入空列表表示恢复自动获取（DHCP）。
+    """
+
+    name = 'base'
+
+    def list_adapters(self):
+        """返回已连接的网络适配器名称列表"""
+        raise NotImplementedError
+
+    def get_dns(self, adapter):
+        """返回 (来源, DNS服务器列表)，来源为 SOURCE_DHCP 或 SOURCE_STATIC"""
+        raise NotImplementedError
+
+    def set_dns(self, adapter, servers):
+        """一次性设置适配器的全部DNS服务器
+
+        实现应先调用 check_dns_args，拒绝会被拼进系统命令的非法输入。
+        """
+        raise NotImplementedError
+
+
+def check_dns_args(adapter, servers):
+    """校验适配器名称和DNS服务器地址，返回规范化后的服务器列表，非法时抛出 DNSBackendError
+
+    服务器必须是单个 IP 地址（不接受 ip:port 等写法）；适配器名称不能含引号或控制字符，
+    以免在 netsh 脚本中拼出额外的参数。
+    """
+    if not adapter or '"' in adapter or any(ord(c) < 32 for c in adapter):
+        raise DNSBackendError(f'无效的网络适配器名称: {adapter!r}')
+    checked = []
+    for server in servers:
+        try:
+            checked.append(str(ipaddress.ip_address(server.strip())))
+        except ValueError:
+            raise DNSBackendError(f'无效的DNS服务器地址: {server!r}') from None
+    return checked
+
+
+def _run(cmd, **kwargs):
+    """执行命令（不经过 shell），失败时抛出 DNSBackendError"""
+    try:
+        result = subprocess.run(
+            cmd,
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors='ignore',
+            **kwargs
+        )
+    except subprocess.CalledProcessError as e:
+        raise DNSBackendError(e.stdout or str(e)) from e
+    except OSError as e:
+        raise DNSBackendError(str(e)) from e
+    return result.stdout
+
+
+class WindowsBackend(DNSBackend):
+    """通过 WMI 枚举适配器，通过 netsh 修改DNS"""
+
+    name = 'windows'
+
+    def list_adapters(self):
+        # 在后台线程中使用 COM 需要先初始化
+        import pythoncom
+        import win32com.client
+
+        pythoncom.CoInitialize()
+        try:
+            wmi = win32com.client.GetObject("winmgmts:")
+            # 只查询需要的字段和已连接的适配器，避免枚举全部适配器对象
+            rows = wmi.ExecQuery(
+                "SELECT NetConnectionID FROM Win32_NetworkAdapter "
+                "WHERE NetConnectionStatus <> 0"
+            )
+            return [row.NetConnectionID for row in rows if row.NetConnectionID]
+        finally:
+            pythoncom.CoUninitialize()
+
+    def get_dns(self, adapter):
+        output = _run(['netsh', 'interface', 'ipv4', 'show', 'dnsservers', f'name={adapter}'])
+        # "DNS servers configured through DHCP" / "通过 DHCP 配置的 DNS 服务器"
+        source = SOURCE_DHCP if 'DHCP' in output else SOURCE_STATIC
+        return source, IP_PATTERN.findall(output)
+
+    def set_dns(self, adapter, servers):
+        servers = check_dns_args(adapter, servers)
+        # 所有修改写入一个 netsh 脚本，只启动一次 netsh；validate=no 跳过逐个连通性检查
+        if servers:
+            lines = [f'interface ipv4 set dnsservers name="{adapter}" source=static '
+                     f'address={servers[0]} register=primary validate=no']
+            for index, server in enumerate(servers[1:], 2):
+                lines.append(f'interface ipv4 add dnsservers name="{adapter}" '
+                             f'address={server} index={index} validate=no')
+        else:
+            lines = [f'interface ipv4 set dnsservers name="{adapter}" source=dhcp']
+
+        fd, script = tempfile.mkstemp(suffix='.netsh', text=True)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write('\n'.join(lines) + '\n')
+            _run(['netsh', '-f', script])
+        finally:
+            os.unlink(script)
+
+
+class LinuxBackend(DNSBackend):
+    """systemd-resolved 可用时按接口设置（resolvectl），否则改写全局 resolv.conf"""
+
+    name = 'linux'
+
+    def __init__(self, resolv_conf='/etc/resolv.conf', sys_net='/sys/class/net', use_resolved=None):
+        self.resolv_conf = resolv_conf
+        self.sys_net = sys_net
+        if use_resolved is None:
+            use_resolved = shutil.which('resolvectl') is not None
+        self.use_resolved = use_resolved
+
+    @property
+    def backup_path(self):
+        return self.resolv_conf + '.dns_switcher.bak'
+
+    def list_adapters(self):
+        try:
+            names = sorted(os.listdir(self.sys_net))
+        except OSError as e:
+            raise DNSBackendError(str(e)) from e
+        return [name for name in names if name != 'lo' and self._operstate(name) == 'up']
+
+    def _operstate(self, name):
+        try:
+            with open(os.path.join(self.sys_net, name, 'operstate'), 'r') as f:
+                return f.read().strip()
+        except OSError:
+            return 'unknown'
+
+    def get_dns(self, adapter):
+        if self.use_resolved:
+            output = _run(['resolvectl', 'dns', adapter])
+            servers = IP_PATTERN.findall(output.partition(':')[2])
+            # resolvectl 不区分来源，没有按接口设置的DNS时视为自动获取
+            return (SOURCE_STATIC if servers else SOURCE_DHCP), servers
+        # 存在备份说明 resolv.conf 已被本工具改写
+        source = SOURCE_STATIC if os.path.exists(self.backup_path) else SOURCE_DHCP
+        servers = []
+        try:
+            with open(self.resolv_conf, 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) >= 2 and parts[0] == 'nameserver':
+                        servers.append(parts[1])
+        except OSError as e:
+            raise DNSBackendError(str(e)) from e
+        return source, servers
+
+    def set_dns(self, adapter, servers):
+        servers = check_dns_args(adapter, servers)
+        if self.use_resolved:
+            if servers:
+                _run(['resolvectl', 'dns', adapter] + list(servers))
+            else:
+                _run(['resolvectl', 'revert', adapter])
+            return
+        self._write_resolv_conf(servers)
+
+    def _write_resolv_conf(self, servers):
+        """原子地替换 resolv.conf 中的 nameserver 行，首次修改前备份原文件"""
+        try:
+            with open(self.resolv_conf, 'r', encoding='utf-8') as f:
+                original = f.read()
+        except FileNotFoundError:
+            original = ''
+        except OSError as e:
+            raise DNSBackendError(str(e)) from e
+
+        if not servers:
+            # 恢复自动获取：还原修改前的备份
+            if not os.path.exists(self.backup_path):
+                return
+            with open(self.backup_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        else:
+            if not os.path.exists(self.backup_path):
+                with open(self.backup_path, 'w', encoding='utf-8') as f:
+                    f.write(original)
+            kept = [line for line in original.splitlines()
+                    if line.split()[:1] != ['nameserver']]
+            content = '\n'.join([f'nameserver {server}' for server in servers] + kept) + '\n'
+
+        # resolv.conf 常是 resolvconf / NetworkManager 管理的符号链接：替换链接指向的文件，链接本身保留
+        target = os.path.realpath(self.resolv_conf)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), prefix='.resolv-')
+        except OSError as e:
+            raise DNSBackendError(str(e)) from e
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            if os.path.exists(target):
+                shutil.copymode(target, tmp_path)
+                st = os.stat(target)
+                try:
+                    os.chown(tmp_path, st.st_uid, st.st_gid)
+                except PermissionError:
+                    pass
+            else:
+                os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, target)
+        except OSError as e:
+            os.unlink(tmp_path)
+            raise DNSBackendError(str(e)) from e
+        if not servers:
+            os.unlink(self.backup_path)
+
+
+class FakeBackend(DNSBackend):
+    """内存中的假后端，用于测试和测量界面响应；delay 模拟系统调用耗时（秒）"""
+
+    name = 'fake'
+
+    def __init__(self, adapters=None, delay=0.0):
+        if adapters is None:
+            adapters = {'以太网': [], 'WLAN': ['192.168.1.1']}
+        self.adapters = {name: list(servers) for name, servers in adapters.items()}
+        self.delay = delay
+        self.calls = []  # 记录 (方法名, 参数)，便于断言调用次数
+
+    def list_adapters(self):
+        self.calls.append(('list_adapters', ()))
+        time.sleep(self.delay)
+        return list(self.adapters)
+
+    def get_dns(self, adapter):
+        self.calls.append(('get_dns', (adapter,)))
+        time.sleep(self.delay)
+        if adapter not in self.adapters:
+            raise DNSBackendError(f'未知的网络适配器: {adapter}')
+        servers = list(self.adapters[adapter])
+        return (SOURCE_STATIC if servers else SOURCE_DHCP), servers
+
+    def set_dns(self, adapter, servers):
+        self.calls.append(('set_dns', (adapter, list(servers))))
+        servers = check_dns_args(adapter, servers)
+        time.sleep(self.delay)
+        if adapter not in self.adapters:
+            raise DNSBackendError(f'未知的网络适配器: {adapter}')
+        self.adapters[adapter] = list(servers)
+
+
+def get_backend():
+    """按当前操作系统选择后端"""
+    system = platform.system()
+    if system == 'Windows':
+        return WindowsBackend()
+    if system == 'Linux':
+        return LinuxBackend()
+    raise DNSBackendError(f'不支持的操作系统: {system}')
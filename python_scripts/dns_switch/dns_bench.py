@@ -0,0 +1,286 @@
+import argparse
+import asyncio
+import random
+import struct
+
+# 常用公共 DNS
+DEFAULT_SERVERS = [
+    '223.5.5.5',        # 阿里
+    '223.6.6.6',
+    '119.29.29.29',     # 腾讯 DNSPod
+    '180.76.76.76',     # 百度
+    '114.114.114.114',  # 114DNS
+    '1.1.1.1',          # Cloudflare
+    '8.8.8.8',          # Google
+    '9.9.9.9',          # Quad9
+]
+
+DEFAULT_DOMAINS = [
+    'www.baidu.com',
+    'www.qq.com',
+    'www.taobao.com',
+    'www.microsoft.com',
+    'github.com',
+]
+
+QTYPE_A = 1
+QCLASS_IN = 1
+
+
+def build_query(domain, qid, qtype=QTYPE_A):
+    """构造一个递归查询的 DNS 请求报文"""
+    header = struct.pack('!HHHHHH', qid, 0x0100, 1, 0, 0, 0)
+    qname = b''.join(
+        bytes([len(label)]) + label
+        for label in (part.encode('idna') for part in domain.rstrip('.').split('.'))
+    ) + b'\x00'
+    return header + qname + struct.pack('!HH', qtype, QCLASS_IN)
+
+
+def skip_name(data, offset):
+    """跳过报文中 offset 处的域名（支持压缩指针），返回其后的偏移"""
+    while True:
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            return offset + 2
+        offset += 1
+        if length == 0:
+            return offset
+        offset += length
+
+
+def parse_question(data):
+    """解析报文中的第一个问题，返回 (问题键, 问题段结束偏移)
+
+    问题键为 (小写域名, 类型, 类别)，可用作缓存键，也用于核对应答与请求是否一致。
+    """
+    if len(data) < 12 or struct.unpack('!H', data[4:6])[0] < 1:
+        raise ValueError('no question')
+    end = skip_name(data, 12)
+    qtype, qclass = struct.unpack('!HH', data[end:end + 4])
+    return (data[12:end].lower(), qtype, qclass), end + 4
+
+
+def parse_server(server, default_port=53):
+    """解析 "ip" 或 "ip:port" 形式的服务器地址"""
+    host, sep, port = server.rpartition(':')
+    if sep and host and '.' in host:
+        return host, int(port)
+    return server, default_port
+
+
+def reply_matches(packet, data):
+    """应答的 ID 和问题段（域名不区分大小写、类型、类别）是否与请求一致"""
+    try:
+        return data[:2] == packet[:2] and parse_question(data)[0] == parse_question(packet)[0]
+    except (ValueError, IndexError, struct.error):
+        return False
+
+
+class _QueryProtocol(asyncio.DatagramProtocol):
+    def __init__(self, packet, future):
+        self.packet = packet
+        self.future = future
+
+    def datagram_received(self, data, addr):
+        # 只接受 ID 和问题段都与请求一致的应答，丢弃伪造或错配的报文
+        if reply_matches(self.packet, data):
+            if not self.future.done():
+                self.future.set_result(data)
+
+    def error_received(self, exc):
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+
+async def exchange(server, packet, timeout=2.0):
+    """向 server 发送一个已构造好的请求报文，返回 (耗时秒, 应答报文)
+
+    应答须与请求的 ID 和问题段一致，其余报文被丢弃；超时抛出 asyncio.TimeoutError。
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: _QueryProtocol(packet, future), remote_addr=parse_server(server)
+    )
+    try:
+        start = loop.time()
+        transport.sendto(packet)
+        data = await asyncio.wait_for(future, timeout)
+        return loop.time() - start, data
+    finally:
+        transport.close()
+
+
+async def exchange_tcp(server, packet, timeout=2.0):
+    """通过 TCP 发送请求报文（带两字节长度前缀），返回 (耗时秒, 应答报文)
+
+    应答与请求不一致时抛出 ConnectionError。
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    async def run():
+        reader, writer = await asyncio.open_connection(*parse_server(server))
+        try:
+            writer.write(struct.pack('!H', len(packet)) + packet)
+            await writer.drain()
+            length = struct.unpack('!H', await reader.readexactly(2))[0]
+            return await reader.readexactly(length)
+        finally:
+            writer.close()
+
+    try:
+        data = await asyncio.wait_for(run(), timeout)
+    except asyncio.IncompleteReadError as e:
+        raise ConnectionError(str(e)) from e
+    if not reply_matches(packet, data):
+        raise ConnectionError('reply does not match the query')
+    return loop.time() - start, data
+
+
+async def query(server, domain, timeout=2.0):
+    """向 server 发送一次查询，返回 (耗时秒, 应答码)；超时抛出 asyncio.TimeoutError"""
+    qid = random.randint(0, 0xFFFF)
+    elapsed, data = await exchange(server, build_query(domain, qid), timeout)
+    return elapsed, data[3] & 0x0F
+
+
+def percentile(values, pct):
+    """线性插值计算百分位数，values 需已排序"""
+    if not values:
+        return None
+    k = (len(values) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (k - lower)
+
+
+class ServerStats:
+    """单个 DNS 服务器的测速结果，延迟单位为毫秒"""
+
+    def __init__(self, server):
+        self.server = server
+        self.latencies = []
+        self.timeouts = 0
+        self.failures = 0  # 网络错误或 SERVFAIL/REFUSED 等应答
+
+    @property
+    def total(self):
+        return len(self.latencies) + self.timeouts + self.failures
+
+    @property
+    def failure_rate(self):
+        """超时和失败占全部查询的比例"""
+        return (self.timeouts + self.failures) / self.total if self.total else 1.0
+
+    def p(self, pct):
+        return percentile(sorted(self.latencies), pct)
+
+    @property
+    def p50(self):
+        return self.p(50)
+
+    @property
+    def p95(self):
+        return self.p(95)
+
+    @property
+    def p99(self):
+        return self.p(99)
+
+    def sort_key(self):
+        """排序依据：先比失败率，再比中位延迟和 p95"""
+        inf = float('inf')
+        return (self.failure_rate, self.p50 if self.latencies else inf,
+                self.p95 if self.latencies else inf)
+
+    def __repr__(self):
+        return (f"ServerStats({self.server!r}, ok={len(self.latencies)}, "
+                f"timeouts={self.timeouts}, failures={self.failures})")
+
+
+async def benchmark_async(servers, domains=DEFAULT_DOMAINS, repeat=3, timeout=2.0, concurrency=64):
+    """测试所有服务器，返回 {服务器: ServerStats}
+
+    每一轮内所有服务器和域名并发查询；各轮依次进行，
+    这样第一轮是冷查询，之后各轮测到的是服务器缓存命中后的延迟。
+    """
+    stats = {server: ServerStats(server) for server in servers}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(server, domain):
+        async with semaphore:
+            try:
+                elapsed, rcode = await query(server, domain, timeout)
+            except asyncio.TimeoutError:
+                stats[server].timeouts += 1
+                return
+            except OSError:
+                stats[server].failures += 1
+                return
+        # NXDOMAIN 也是正常应答，只有服务端错误才算失败
+        if rcode in (0, 3):
+            stats[server].latencies.append(elapsed * 1000)
+        else:
+            stats[server].failures += 1
+
+    for _ in range(repeat):
+        await asyncio.gather(*(
+            one(server, domain)
+            for domain in domains
+            for server in servers
+        ))
+    return stats
+
+
+def benchmark(servers, domains=DEFAULT_DOMAINS, repeat=3, timeout=2.0, concurrency=64):
+    """benchmark_async 的同步版本，可在后台线程中调用"""
+    return asyncio.run(benchmark_async(servers, domains, repeat, timeout, concurrency))
+
+
+def rank(stats):
+    """按失败率和延迟从快到慢排序，返回 ServerStats 列表"""
+    return sorted(stats.values(), key=ServerStats.sort_key)
+
+
+def best_two(stats):
+    """返回最快的两个可用服务器 (主DNS, 备用DNS)，不足时以 None 补齐"""
+    usable = [s.server for s in rank(stats) if s.latencies]
+    usable += [None, None]
+    return usable[0], usable[1]
+
+
+def format_report(stats):
+    """生成测速结果表格文本"""
+    def ms(value):
+        return f"{value:8.1f}" if value is not None else f"{'-':>8}"
+
+    lines = [f"{'server':<22}{'p50':>8}{'p95':>8}{'p99':>8}{'timeout':>9}{'fail%':>8}"]
+    for s in rank(stats):
+        lines.append(f"{s.server:<22}{ms(s.p50)}{ms(s.p95)}{ms(s.p99)}"
+                     f"{s.timeouts:>9}{s.failure_rate * 100:>7.1f}%")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark DNS resolver latency',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('servers', nargs='*', default=DEFAULT_SERVERS,
+                        help='Resolvers to test, as ip or ip:port')
+    parser.add_argument('-d', '--domains', nargs='+', default=DEFAULT_DOMAINS,
+                        help='Domains to query')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Queries per domain')
+    parser.add_argument('-t', '--timeout', type=float, default=2.0, help='Timeout in seconds')
+    args = parser.parse_args()
+
+    stats = benchmark(args.servers, args.domains, args.repeat, args.timeout)
+    print(format_report(stats))
+    primary, secondary = best_two(stats)
+    print(f"\n主DNS: {primary}  备用DNS: {secondary}")
+
+
+if __name__ == '__main__':
+    main()
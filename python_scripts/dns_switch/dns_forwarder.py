@@ -0,0 +1,367 @@
+import argparse
+import asyncio
+import struct
+import threading
+import time
+from collections import OrderedDict, deque
+
+import dns_bench
+from dns_bench import parse_question, skip_name
+
+TYPE_SOA = 6
+TYPE_OPT = 41
+FLAG_TC = 0x02  # 报文第 3 字节中的截断标志
+RCODE_NOERROR = 0
+RCODE_SERVFAIL = 2
+RCODE_NXDOMAIN = 3
+
+
+def parse_ttls(data):
+    """扫描应答中的资源记录，返回 (各 TTL 字段偏移列表, 最小 TTL, SOA 最小值)
+
+    OPT 记录的 TTL 字段另有含义，不计入。没有记录时最小 TTL 为 None。
+    """
+    qdcount, ancount, nscount, arcount = struct.unpack('!HHHH', data[4:12])
+    offset = 12
+    for _ in range(qdcount):
+        offset = skip_name(data, offset) + 4
+    ttl_offsets = []
+    min_ttl = None
+    soa_minimum = None
+    for _ in range(ancount + nscount + arcount):
+        offset = skip_name(data, offset)
+        rtype, _, ttl, rdlength = struct.unpack('!HHIH', data[offset:offset + 10])
+        rdata = offset + 10
+        if rtype != TYPE_OPT:
+            ttl_offsets.append(offset + 4)
+            min_ttl = ttl if min_ttl is None else min(min_ttl, ttl)
+        if rtype == TYPE_SOA:
+            pos = skip_name(data, skip_name(data, rdata))
+            soa_minimum = min(ttl, struct.unpack('!I', data[pos + 16:pos + 20])[0])
+        offset = rdata + rdlength
+    return ttl_offsets, min_ttl, soa_minimum
+
+
+class DNSCache:
+    """遵守 TTL 的 LRU 应答缓存，支持否定缓存（NXDOMAIN / 无记录）
+
+    命中时返回的报文会改写请求 ID，并按已缓存时长递减各记录的 TTL。
+    """
+
+    def __init__(self, max_size=10000, negative_ttl=60, max_ttl=86400, clock=time.monotonic):
+        self.max_size = max_size
+        self.negative_ttl = negative_ttl
+        self.max_ttl = max_ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # 键 -> (存入时间, 过期时间, 应答, TTL 偏移)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, qid):
+        """查找缓存，命中时返回可直接发给客户端的应答，否则返回 None"""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored, expires, response, ttl_offsets = entry
+            if now >= expires:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+
+        data = bytearray(response)
+        data[0:2] = struct.pack('!H', qid)
+        elapsed = int(now - stored)
+        for pos in ttl_offsets:
+            ttl = struct.unpack('!I', data[pos:pos + 4])[0]
+            data[pos:pos + 4] = struct.pack('!I', max(0, ttl - elapsed))
+        return bytes(data)
+
+    def put(self, key, response):
+        """按应答中的 TTL 缓存，返回是否已缓存
+
+        SERVFAIL 等错误应答和被截断（TC）的应答不缓存。
+        """
+        rcode = response[3] & 0x0F
+        if rcode not in (RCODE_NOERROR, RCODE_NXDOMAIN) or response[2] & FLAG_TC:
+            return False
+        try:
+            ttl_offsets, min_ttl, soa_minimum = parse_ttls(response)
+            ancount = struct.unpack('!H', response[6:8])[0]
+        except (IndexError, struct.error):
+            return False
+
+        if rcode == RCODE_NXDOMAIN or ancount == 0:
+            # 否定应答按 SOA 最小值缓存（RFC 2308），没有 SOA 时使用默认值
+            ttl = soa_minimum if soa_minimum is not None else self.negative_ttl
+            ttl = min(ttl, self.negative_ttl)
+        else:
+            ttl = min_ttl
+        ttl = min(ttl, self.max_ttl)
+        if ttl <= 0:
+            return False
+
+        now = self._clock()
+        with self._lock:
+            self._entries[key] = (now, now + ttl, bytes(response), ttl_offsets)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class ForwarderStats:
+    """命中/未命中计数和上游延迟统计，延迟单位为毫秒"""
+
+    def __init__(self, window=1000):
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self.latencies = deque(maxlen=window)  # 最近若干次上游查询的延迟
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def summary(self):
+        values = sorted(self.latencies)
+        p50 = dns_bench.percentile(values, 50)
+        p95 = dns_bench.percentile(values, 95)
+        text = (f"命中 {self.hits}  未命中 {self.misses}  失败 {self.failures}  "
+                f"命中率 {self.hit_rate * 100:.1f}%")
+        if p50 is not None:
+            text += f"  上游 p50 {p50:.1f} ms  p95 {p95:.1f} ms"
+        return text
+
+
+class _ServerProtocol(asyncio.DatagramProtocol):
+    def __init__(self, forwarder):
+        self.forwarder = forwarder
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        asyncio.ensure_future(self.forwarder.handle(data, addr, self.transport))
+
+
+class DNSForwarder:
+    """本地缓存 DNS 转发器
+
+    同时监听 UDP 和 TCP。未命中缓存的请求并行发给所有上游，采用最先返回的有效应答；
+    TCP 请求经 TCP 转发，这样客户端收到截断（TC）应答后可以用 TCP 重试。
+    只缓存 UDP 上未截断的应答。
+    """
+
+    def __init__(self, upstreams, host='127.0.0.1', port=53, cache=None, timeout=2.0):
+        if not upstreams:
+            raise ValueError('至少需要一个上游 DNS')
+        self.upstreams = list(upstreams)
+        self.host = host
+        self.port = port
+        self.cache = cache if cache is not None else DNSCache()
+        self.timeout = timeout
+        self.stats = ForwarderStats()
+        self._transport = None
+        self._tcp_server = None
+
+    # TCP 连接空闲多久后关闭（秒）
+    TCP_IDLE_TIMEOUT = 10
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _ServerProtocol(self), local_addr=(self.host, self.port)
+        )
+        # 端口为 0 时记录系统实际分配的端口，TCP 使用同一端口
+        self.port = self._transport.get_extra_info('sockname')[1]
+        try:
+            self._tcp_server = await asyncio.start_server(self._handle_tcp, self.host, self.port)
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        if self._tcp_server is not None:
+            self._tcp_server.close()
+            self._tcp_server = None
+
+    async def _handle_tcp(self, reader, writer):
+        """处理一个 TCP 连接，支持同一连接上的多个请求"""
+        try:
+            while True:
+                header = await asyncio.wait_for(reader.readexactly(2), self.TCP_IDLE_TIMEOUT)
+                length = struct.unpack('!H', header)[0]
+                data = await reader.readexactly(length)
+                response = await self.resolve(data, tcp=True)
+                if response is None:
+                    break
+                writer.write(struct.pack('!H', len(response)) + response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def resolve(self, data, tcp=False):
+        """处理一个请求报文，返回应答报文"""
+        qid = struct.unpack('!H', data[:2])[0]
+        try:
+            key, _ = parse_question(data)
+        except (ValueError, IndexError, struct.error):
+            return None
+
+        response = self.cache.get(key, qid)
+        if response is not None:
+            self.stats.hits += 1
+            return response
+
+        self.stats.misses += 1
+        response = await self._forward(data, tcp)
+        if response is None:
+            self.stats.failures += 1
+            return self._servfail(data)
+        if not tcp:
+            # TCP 应答可能超过 UDP 报文大小，不放入缓存
+            self.cache.put(key, response)
+        return response
+
+    async def handle(self, data, addr, transport):
+        response = await self.resolve(data)
+        if response is not None and not transport.is_closing():
+            transport.sendto(response, addr)
+
+    async def _forward(self, data, tcp=False):
+        """并行发给所有上游，返回最先到达的有效应答；全部失败时返回 None"""
+        exchange = dns_bench.exchange_tcp if tcp else dns_bench.exchange
+        tasks = [
+            asyncio.ensure_future(exchange(server, data, self.timeout))
+            for server in self.upstreams
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    elapsed, response = await next_done
+                except (asyncio.TimeoutError, OSError):
+                    continue
+                if response[3] & 0x0F in (RCODE_NOERROR, RCODE_NXDOMAIN):
+                    self.stats.latencies.append(elapsed * 1000)
+                    return response
+            return None
+        finally:
+            for task in tasks:
+                if task.done() and not task.cancelled():
+                    task.exception()  # 已结束的失败任务，避免“异常未被读取”的警告
+                else:
+                    task.cancel()
+
+    @staticmethod
+    def _servfail(data):
+        """根据请求构造 SERVFAIL 应答"""
+        try:
+            _, end = parse_question(data)
+        except (ValueError, IndexError, struct.error):
+            return None
+        flags = 0x8180 | RCODE_SERVFAIL | (struct.unpack('!H', data[2:4])[0] & 0x0100)
+        return data[:2] + struct.pack('!HHHHH', flags, 1, 0, 0, 0) + data[12:end]
+
+
+class ForwarderThread:
+    """在后台线程的事件循环中运行 DNSForwarder，供图形界面启停"""
+
+    def __init__(self, forwarder):
+        self.forwarder = forwarder
+        self._loop = None
+        self._thread = None
+
+    def start(self):
+        """启动转发器，监听失败时抛出 OSError"""
+        started = threading.Event()
+        errors = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            try:
+                self._loop.run_until_complete(self.forwarder.start())
+            except OSError as e:
+                errors.append(e)
+                started.set()
+                self._loop.close()
+                return
+            started.set()
+            try:
+                self._loop.run_forever()
+            finally:
+                self.forwarder.close()
+                for task in asyncio.all_tasks(self._loop):
+                    task.cancel()
+                # 让关闭套接字等回调执行完再关闭事件循环
+                self._loop.run_until_complete(asyncio.sleep(0))
+                self._loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+
+async def serve(args):
+    cache = DNSCache(max_size=args.cache_size, negative_ttl=args.negative_ttl)
+    forwarder = DNSForwarder(args.upstreams, args.host, args.port, cache, args.timeout)
+    await forwarder.start()
+    print(f"Listening on {forwarder.host}:{forwarder.port}, upstreams: {', '.join(forwarder.upstreams)}")
+    try:
+        while True:
+            await asyncio.sleep(args.report)
+            print(forwarder.stats.summary())
+    finally:
+        forwarder.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Local caching DNS forwarder',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('upstreams', nargs='+', help='Upstream resolvers, as ip or ip:port')
+    parser.add_argument('--host', default='127.0.0.1', help='Listen address')
+    parser.add_argument('-p', '--port', type=int, default=53, help='Listen port')
+    parser.add_argument('-c', '--cache-size', type=int, default=10000, help='Maximum cached answers')
+    parser.add_argument('-n', '--negative-ttl', type=int, default=60,
+                        help='Maximum seconds to cache NXDOMAIN / empty answers')
+    parser.add_argument('-t', '--timeout', type=float, default=2.0, help='Upstream timeout in seconds')
+    parser.add_argument('-r', '--report', type=float, default=60, help='Seconds between stats reports')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+import argparse
+import asyncio
+import socket
+import struct
+
+TYPE_A = 1
+TYPE_SOA = 6
+CLASS_IN = 1
+RCODE_NOERROR = 0
+RCODE_NXDOMAIN = 3
+
+
+class _StubProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.server.queries += 1
+        if self.server.drop:
+            return
+        response = self.server.build_response(data)
+        if response is None:
+            return
+        loop = asyncio.get_running_loop()
+        loop.call_later(self.server.delay, self._send, response, addr)
+
+    def _send(self, response, addr):
+        if not self.transport.is_closing():
+            self.transport.sendto(response, addr)
+
+
+class StubDNSServer:
+    """本地桩 DNS 服务器，用于离线测试测速和转发器
+
+    :param delay: 每个应答延迟的秒数
+    :param rcode: 应答码；NOERROR 时返回一条 A 记录，NXDOMAIN 时在授权段附带 SOA
+    :param answer: A 记录的 IP
+    :param ttl: A 记录的 TTL
+    :param negative_ttl: NXDOMAIN 应答中 SOA 的最小值
+    :param drop: 为 True 时不应答，用于模拟超时
+    :param truncated: 为 True 时在 UDP 应答中设置 TC 标志
+    :param tcp: 为 True 时同时在同一端口监听 TCP（TCP 应答从不截断）
+    :param wrong_question: 为 True 时应答中的问题段换成另一个域名，模拟伪造或错配的应答
+    """
+
+    def __init__(self, delay=0.0, rcode=RCODE_NOERROR, answer='1.2.3.4', ttl=300,
+                 negative_ttl=30, drop=False, truncated=False, tcp=False, wrong_question=False,
+                 host='127.0.0.1', port=0):
+        self.delay = delay
+        self.rcode = rcode
+        self.answer = answer
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.drop = drop
+        self.truncated = truncated
+        self.tcp = tcp
+        self.wrong_question = wrong_question
+        self.host = host
+        self.port = port
+        self.queries = 0
+        self.tcp_queries = 0
+        self._transport = None
+        self._tcp_server = None
+
+    @property
+    def address(self):
+        """"ip:port" 形式的地址，可直接传给 dns_bench / dns_forwarder"""
+        return f"{self.host}:{self.port}"
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _StubProtocol(self), local_addr=(self.host, self.port)
+        )
+        self.port = self._transport.get_extra_info('sockname')[1]
+        if self.tcp:
+            self._tcp_server = await asyncio.start_server(self._handle_tcp, self.host, self.port)
+        return self
+
+    def close(self):
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        if self._tcp_server is not None:
+            self._tcp_server.close()
+            self._tcp_server = None
+
+    async def _handle_tcp(self, reader, writer):
+        try:
+            length = struct.unpack('!H', await reader.readexactly(2))[0]
+            data = await reader.readexactly(length)
+            self.tcp_queries += 1
+            if self.drop:
+                return
+            await asyncio.sleep(self.delay)
+            response = self.build_response(data, truncated=False)
+            writer.write(struct.pack('!H', len(response)) + response)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def build_response(self, data, truncated=None):
+        """根据请求报文构造应答，请求无法解析时返回 None"""
+        if truncated is None:
+            truncated = self.truncated
+        if len(data) < 12:
+            return None
+        offset = 12
+        while data[offset] != 0:
+            offset += data[offset] + 1
+        question = data[12:offset + 5]
+        if self.wrong_question:
+            question = b'\x05other\x07example\x00' + data[offset + 1:offset + 5]
+
+        flags = 0x8180 | self.rcode | (0x0200 if truncated else 0)
+        records = b''
+        ancount = nscount = 0
+        if self.rcode == RCODE_NOERROR:
+            ancount = 1
+            records = b'\xc0\x0c' + struct.pack('!HHIH', TYPE_A, CLASS_IN, self.ttl, 4)
+            records += socket.inet_aton(self.answer)
+        elif self.rcode == RCODE_NXDOMAIN:
+            nscount = 1
+            rdata = b'\x00\x00' + struct.pack('!IIIII', 1, 3600, 600, 86400, self.negative_ttl)
+            records = b'\xc0\x0c' + struct.pack('!HHIH', TYPE_SOA, CLASS_IN, 900, len(rdata)) + rdata
+        header = data[:2] + struct.pack('!HHHHH', flags, 1, ancount, nscount, 0)
+        return header + question + records
+
+
+async def serve(args):
+    server = await StubDNSServer(args.delay, args.rcode, args.answer, args.ttl,
+                                 drop=args.drop, tcp=args.tcp, host=args.host, port=args.port).start()
+    print(f"Stub DNS listening on {server.address}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Stub DNS server for offline testing',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--host', default='127.0.0.1', help='Listen address')
+    parser.add_argument('-p', '--port', type=int, default=5353, help='Listen port')
+    parser.add_argument('-d', '--delay', type=float, default=0.0, help='Reply delay in seconds')
+    parser.add_argument('-r', '--rcode', type=int, default=0, help='Response code')
+    parser.add_argument('-a', '--answer', default='1.2.3.4', help='A record address')
+    parser.add_argument('-t', '--ttl', type=int, default=300, help='A record TTL')
+    parser.add_argument('--drop', action='store_true', help='Never reply')
+    parser.add_argument('--tcp', action='store_true', help='Also listen on TCP')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
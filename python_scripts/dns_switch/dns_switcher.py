@@ -1,39 +1,74 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import subprocess
-import win32com.client
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import dns_backends
+import dns_bench
+import dns_forwarder
+
+LOCAL_DNS = "127.0.0.1"
 
 class DNSSwitcherApp:
-    def __init__(self, root):
+    def __init__(self, root, backend=None):
         self.root = root
         self.root.title("DNS切换工具")
+
+        # 系统调用都在单个后台线程中按顺序执行，界面线程不阻塞
+        self.backend = backend if backend is not None else dns_backends.get_backend()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.dns_cache = {}  # 适配器 -> (DNS来源, 当前DNS列表)
+        self.closing = False
         
-        # 获取网络适配器列表
-        self.adapters = self.get_network_adapters()
+        # 本地缓存DNS转发器（按需启动）、指向它的适配器及该适配器原来的DNS配置
+        self.forwarder_thread = None
+        self.forwarder_adapter = None
+        self.forwarder_original = None
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # 网络适配器列表在后台获取
+        self.adapters = []
         
         # 创建界面组件
         self.create_widgets()
         
-        # 初始化当前DNS显示
-        self.show_current_dns()
-
-    def get_network_adapters(self):
-        """获取所有网络适配器名称"""
-        adapters = []
-        wmi = win32com.client.GetObject("winmgmts:")
-        for adapter in wmi.InstancesOf("Win32_NetworkAdapter"):
-            print(adapter.NetConnectionStatus)
-            if adapter.NetConnectionStatus:  # 已连接的适配器
-                adapters.append(adapter.NetConnectionID)
-        return adapters
+        # 获取适配器后再显示当前DNS
+        self.refresh_adapters()
+
+    def run_in_background(self, func, args=(), on_done=None, on_error=None):
+        """在后台线程执行 func，结果通过 root.after 回到界面线程处理"""
+        def task():
+            try:
+                result = func(*args)
+            except Exception as e:
+                self.root.after(0, on_error or self.show_backend_error, e)
+                return
+            if on_done is not None:
+                self.root.after(0, on_done, result)
+        return self.executor.submit(task)
+
+    def show_backend_error(self, error):
+        messagebox.showerror("错误", f"操作失败:\n{str(error)}")
+
+    def refresh_adapters(self):
+        self.current_dns_label.config(text="正在获取网络适配器...")
+        self.run_in_background(self.backend.list_adapters, on_done=self.adapters_loaded)
+
+    def adapters_loaded(self, adapters):
+        self.adapters = adapters
+        self.adapter_combo.config(values=adapters)
+        if adapters:
+            self.adapter_combo.current(0)
+            self.show_current_dns()
+        else:
+            self.current_dns_label.config(text="未找到已连接的网络适配器")
 
     def create_widgets(self):
         # 网络适配器选择
         ttk.Label(self.root, text="选择网络适配器:").grid(row=0, column=0, padx=5, pady=5, sticky=tk.W)
-        self.adapter_combo = ttk.Combobox(self.root, values=self.adapters)
+        self.adapter_combo = ttk.Combobox(self.root, values=self.adapters, state="readonly")
         self.adapter_combo.grid(row=0, column=1, padx=5, pady=5, sticky=tk.EW)
-        if self.adapters:
-            self.adapter_combo.current(0)
+        self.adapter_combo.bind("<<ComboboxSelected>>", lambda event: self.show_current_dns())
 
         # DNS模式选择
         self.dns_mode = tk.StringVar(value="auto")
@@ -55,8 +90,20 @@ class DNSSwitcherApp:
         self.current_dns_label = ttk.Label(self.root, text="")
         self.current_dns_label.grid(row=5, column=0, columnspan=2, padx=5, pady=5)
 
+        # 测速按钮
+        self.auto_apply = tk.BooleanVar(value=False)
+        self.bench_button = ttk.Button(self.root, text="测速并选择最快DNS", command=self.start_benchmark)
+        self.bench_button.grid(row=6, column=0, padx=5, pady=5, sticky=tk.W)
+        ttk.Checkbutton(self.root, text="测速后自动应用", variable=self.auto_apply).grid(row=6, column=1, padx=5, pady=5, sticky=tk.W)
+
+        # 本地缓存DNS
+        self.use_cache = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.root, text="使用本地缓存DNS（转发到上面的DNS）",
+                        variable=self.use_cache).grid(row=7, column=0, padx=5, pady=5, sticky=tk.W)
+        ttk.Button(self.root, text="缓存统计", command=self.show_cache_stats).grid(row=7, column=1, padx=5, pady=5, sticky=tk.W)
+
         # 应用按钮
-        ttk.Button(self.root, text="应用配置", command=self.apply_dns).grid(row=6, column=0, columnspan=2, pady=10)
+        ttk.Button(self.root, text="应用配置", command=self.apply_dns).grid(row=8, column=0, columnspan=2, pady=10)
 
         # 配置网格布局
         self.root.columnconfigure(1, weight=1)
@@ -67,63 +114,226 @@ class DNSSwitcherApp:
         self.primary_dns.config(state=state)
         self.secondary_dns.config(state=state)
 
-    def show_current_dns(self):
-        """显示当前DNS配置"""
-        adapter = self.adapter_combo.get()
+    def start_benchmark(self):
+        """在后台线程中测速候选DNS，避免界面卡顿"""
+        self.bench_button.config(state="disabled")
+        self.current_dns_label.config(text="正在测速...")
+        threading.Thread(target=self.run_benchmark, daemon=True).start()
+
+    def run_benchmark(self):
         try:
-            result = subprocess.check_output(
-                f'netsh interface ipv4 show dnsservers "{adapter}"',
-                shell=True,
-                text=True
-            )
-            self.current_dns_label.config(text=result)
-        except subprocess.CalledProcessError as e:
-            messagebox.showerror("错误", f"获取DNS配置失败:\n{e.output}")
+            stats = dns_bench.benchmark(dns_bench.DEFAULT_SERVERS)
+        except Exception as e:
+            self.root.after(0, self.benchmark_failed, e)
+            return
+        self.root.after(0, self.benchmark_done, stats)
+
+    def benchmark_failed(self, error):
+        self.bench_button.config(state="normal")
+        self.current_dns_label.config(text="")
+        messagebox.showerror("错误", f"DNS测速失败:\n{str(error)}")
+
+    def benchmark_done(self, stats):
+        """用测速结果填入最快的两个DNS，并按需直接应用"""
+        self.bench_button.config(state="normal")
+        self.current_dns_label.config(text=dns_bench.format_report(stats), font="TkFixedFont")
+        primary, secondary = dns_bench.best_two(stats)
+        if primary is None:
+            messagebox.showerror("错误", "所有候选DNS均不可用")
+            return
+
+        self.dns_mode.set("manual")
+        self.toggle_dns_fields()
+        self.primary_dns.delete(0, tk.END)
+        self.primary_dns.insert(0, primary)
+        self.secondary_dns.delete(0, tk.END)
+        if secondary:
+            self.secondary_dns.insert(0, secondary)
+
+        if self.auto_apply.get():
+            self.apply_dns()
+
+    def show_current_dns(self, refresh=False):
+        """显示当前DNS配置，优先使用缓存结果"""
+        adapter = self.adapter_combo.get()
+        if not adapter:
+            return
+        if not refresh and adapter in self.dns_cache:
+            self.display_dns(adapter, self.dns_cache[adapter])
+            return
+
+        def loaded(result):
+            self.dns_cache[adapter] = result
+            if self.adapter_combo.get() == adapter:
+                self.display_dns(adapter, result)
+
+        def failed(error):
+            messagebox.showerror("错误", f"获取DNS配置失败:\n{str(error)}")
+
+        self.run_in_background(self.backend.get_dns, (adapter,), loaded, failed)
+
+    def display_dns(self, adapter, result):
+        source, servers = result
+        lines = list(servers)
+        if source == dns_backends.SOURCE_DHCP:
+            lines.insert(0, "自动获取")
+        text = "\n".join(lines) if lines else "未设置"
+        self.current_dns_label.config(text=f"{adapter} 当前DNS:\n{text}")
+
+    def start_forwarder(self, adapter, upstreams):
+        """为 adapter 启动（或以新的上游重启）本地缓存DNS转发器
+
+        转发器此前服务于另一个适配器时，先把那个适配器恢复为原来的DNS配置。
+        首次指向转发器前在后台记录适配器原来的配置，停止转发器时据此恢复。
+        """
+        if adapter == self.forwarder_adapter:
+            # 只是更换上游：保留首次记录的原始配置（此时适配器已指向 127.0.0.1）
+            original = self.forwarder_original
+        else:
+            if self.forwarder_adapter is not None:
+                self.restore_forwarder_adapter()
+            original = {}
+
+            def failed(error):
+                messagebox.showerror(
+                    "错误", f"读取 {adapter} 原来的DNS配置失败，停止缓存时将恢复为自动获取:\n{str(error)}")
+
+            self.run_in_background(self.capture_dns, (adapter, original), on_error=failed)
+        self.stop_forwarder()
+        forwarder = dns_forwarder.DNSForwarder(upstreams, host=LOCAL_DNS)
+        thread = dns_forwarder.ForwarderThread(forwarder)
+        thread.start()
+        self.forwarder_thread = thread
+        self.forwarder_adapter = adapter
+        self.forwarder_original = original
+
+    def stop_forwarder(self):
+        if self.forwarder_thread is not None:
+            self.forwarder_thread.stop()
+            self.forwarder_thread = None
+        self.forwarder_adapter = None
+        self.forwarder_original = None
+
+    def capture_dns(self, adapter, original):
+        """（后台线程）记录适配器指向转发器之前的 (来源, DNS列表)"""
+        original['dns'] = self.backend.get_dns(adapter)
+
+    def restore_dns(self, adapter, original):
+        """（后台线程）把适配器恢复为 capture_dns 记录的配置，自动获取的恢复为自动获取
+
+        后台任务按提交顺序执行，capture_dns 一定先于此处完成；没有记录时恢复为自动获取。
+        """
+        source, servers = original.get('dns', (dns_backends.SOURCE_DHCP, []))
+        if source == dns_backends.SOURCE_DHCP:
+            servers = []
+        self.backend.set_dns(adapter, [server for server in servers if server != LOCAL_DNS])
+
+    def restore_forwarder_adapter(self):
+        """把指向转发器的适配器恢复为原来的DNS配置，并停止转发器"""
+        if self.forwarder_thread is None:
+            return
+        adapter = self.forwarder_adapter
+
+        def failed(error):
+            messagebox.showerror("错误", f"恢复 {adapter} 的DNS配置失败:\n{str(error)}")
+
+        self.run_in_background(self.restore_dns, (adapter, self.forwarder_original), on_error=failed)
+        self.dns_cache.pop(adapter, None)
+        self.stop_forwarder()
+
+    def show_cache_stats(self):
+        if self.forwarder_thread is None:
+            messagebox.showinfo("缓存统计", "本地缓存DNS未启动")
+            return
+        forwarder = self.forwarder_thread.forwarder
+        messagebox.showinfo(
+            "缓存统计",
+            f"上游: {', '.join(forwarder.upstreams)}\n"
+            f"缓存条目: {len(forwarder.cache)}\n"
+            f"{forwarder.stats.summary()}"
+        )
+
+    def on_close(self):
+        """关闭窗口：把适配器恢复为原来DNS配置的操作排到后台队列末尾，
+        等队列中的操作（包括正在执行的 set_dns）全部完成后再停止转发器并销毁窗口"""
+        if self.closing:
+            return
+        self.closing = True
+        self.root.withdraw()
+        if self.forwarder_thread is not None:
+            def failed(error):
+                messagebox.showerror("错误", f"恢复DNS配置失败:\n{str(error)}")
+
+            self.run_in_background(self.restore_dns, (self.forwarder_adapter, self.forwarder_original),
+                                   on_error=failed)
+
+        def drain():
+            self.executor.shutdown(wait=True)
+            self.root.after(0, self.finish_close)
+
+        threading.Thread(target=drain, daemon=True).start()
+
+    def finish_close(self):
+        self.stop_forwarder()
+        self.root.destroy()
 
     def apply_dns(self):
-        """应用DNS配置"""
+        """应用DNS配置，主/备DNS在后台一次性批量设置"""
         adapter = self.adapter_combo.get()
         if not adapter:
             messagebox.showerror("错误", "请选择网络适配器")
             return
 
-        try:
-            if self.dns_mode.get() == "auto":
-                subprocess.run(
-                    f'netsh interface ipv4 set dns name="{adapter}" source=dhcp',
-                    shell=True,
-                    check=True
-                )
-            else:
-                primary = self.primary_dns.get()
-                secondary = self.secondary_dns.get()
-                
-                if not primary:
-                    messagebox.showerror("错误", "请输入主DNS地址")
-                    return
-                
-                # 设置主DNS
-                subprocess.run(
-                    f'netsh interface ipv4 set dns name="{adapter}" static {primary} primary',
-                    shell=True,
-                    check=True
-                )
-                
-                # 设置备用DNS
-                if secondary:
-                    subprocess.run(
-                        f'netsh interface ipv4 add dns name="{adapter}" {secondary} index=2',
-                        shell=True,
-                        check=True
-                    )
+        if self.dns_mode.get() == "auto":
+            # 只有该适配器原本指向转发器时才停止转发器
+            if adapter == self.forwarder_adapter:
+                self.stop_forwarder()
+            servers = []
+        else:
+            primary = self.primary_dns.get().strip()
+            secondary = self.secondary_dns.get().strip()
             
+            if not primary:
+                messagebox.showerror("错误", "请输入主DNS地址")
+                return
+
+            upstreams = [dns for dns in (primary, secondary) if dns]
+            try:
+                if self.use_cache.get():
+                    # 转发器的上游允许 ip:port，写入系统的只有 127.0.0.1
+                    dns_backends.check_dns_args(
+                        adapter, [dns_bench.parse_server(dns)[0] for dns in upstreams])
+                else:
+                    upstreams = dns_backends.check_dns_args(adapter, upstreams)
+            except dns_backends.DNSBackendError as e:
+                messagebox.showerror("错误", str(e))
+                return
+            except ValueError:
+                messagebox.showerror("错误", "DNS地址格式应为 IP 或 IP:端口")
+                return
+
+            if self.use_cache.get():
+                # 适配器指向本地转发器，由它并行转发到主/备DNS
+                try:
+                    self.start_forwarder(adapter, upstreams)
+                except OSError as e:
+                    messagebox.showerror("错误", f"启动本地缓存DNS失败:\n{str(e)}")
+                    return
+                servers = [LOCAL_DNS]
+            else:
+                if adapter == self.forwarder_adapter:
+                    self.stop_forwarder()
+                servers = upstreams
+
+        def applied(_):
+            self.dns_cache.pop(adapter, None)
             messagebox.showinfo("成功", "DNS配置已更新")
-            self.show_current_dns()
-            
-        except subprocess.CalledProcessError as e:
-            messagebox.showerror("错误", f"配置DNS失败:\n{e.stderr}")
-        except Exception as e:
-            messagebox.showerror("错误", f"发生未知错误:\n{str(e)}")
+            self.show_current_dns(refresh=True)
+
+        def failed(error):
+            messagebox.showerror("错误", f"配置DNS失败:\n{str(error)}")
+
+        self.run_in_background(self.backend.set_dns, (adapter, servers), applied, failed)
 
 if __name__ == "__main__":
     root = tk.Tk()
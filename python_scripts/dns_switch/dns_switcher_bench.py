@@ -0,0 +1,59 @@
+import argparse
+import time
+import tkinter as tk
+
+import dns_backends
+from dns_switcher import DNSSwitcherApp
+
+
+def measure(delay, timeout):
+    """返回 (界面可交互耗时, 适配器列表加载耗时, 当前DNS显示耗时)，单位秒"""
+    backend = dns_backends.FakeBackend(delay=delay)
+    start = time.perf_counter()
+    root = tk.Tk()
+    app = None
+    try:
+        app = DNSSwitcherApp(root, backend=backend)
+        root.update()
+        interactive = time.perf_counter() - start
+
+        adapters_at = dns_at = None
+        deadline = start + timeout
+        while time.perf_counter() < deadline and dns_at is None:
+            root.update()
+            now = time.perf_counter()
+            if adapters_at is None and app.adapters:
+                adapters_at = now - start
+            if app.dns_cache:
+                dns_at = now - start
+            time.sleep(0.001)
+        return interactive, adapters_at, dns_at
+    finally:
+        if app is not None:
+            app.executor.shutdown(wait=True)
+        root.destroy()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure DNSSwitcherApp startup-to-interactive time with the fake backend',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-d', '--delay', type=float, default=1.0,
+                        help='Simulated seconds per backend call')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Runs')
+    parser.add_argument('-t', '--timeout', type=float, default=30, help='Give up after seconds')
+    args = parser.parse_args()
+
+    def ms(value):
+        return f"{value * 1000:8.1f} ms" if value is not None else "  timeout"
+
+    print(f"fake backend delay: {args.delay * 1000:.0f} ms per call")
+    for i in range(args.repeat):
+        interactive, adapters_at, dns_at = measure(args.delay, args.timeout)
+        print(f"run {i + 1}: interactive {ms(interactive)}  adapters {ms(adapters_at)}  "
+              f"current DNS {ms(dns_at)}")
+
+
+if __name__ == '__main__':
+    main()
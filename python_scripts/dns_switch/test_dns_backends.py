@@ -0,0 +1,125 @@
+import os
+import stat
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import dns_backends
+from dns_backends import SOURCE_DHCP, SOURCE_STATIC
+
+NETSH_DHCP = '''
+Configuration for interface "Ethernet"
+    DNS servers configured through DHCP:  192.168.1.1
+                                          192.168.1.2
+    Register with which suffix:           Primary only
+'''
+
+NETSH_STATIC = '''
+Configuration for interface "Ethernet"
+    Statically Configured DNS Servers:    8.8.8.8
+                                          1.1.1.1
+    Register with which suffix:           Primary only
+'''
+
+
+class WindowsBackendTest(unittest.TestCase):
+    def get_dns(self, output):
+        with mock.patch.object(dns_backends, '_run', return_value=output):
+            return dns_backends.WindowsBackend().get_dns('Ethernet')
+
+    def test_dhcp_source(self):
+        self.assertEqual(self.get_dns(NETSH_DHCP), (SOURCE_DHCP, ['192.168.1.1', '192.168.1.2']))
+
+    def test_static_source(self):
+        self.assertEqual(self.get_dns(NETSH_STATIC), (SOURCE_STATIC, ['8.8.8.8', '1.1.1.1']))
+
+    def set_dns(self, adapter, servers):
+        """返回 set_dns 生成的 netsh 脚本内容"""
+        scripts = []
+
+        def run(cmd):
+            with open(cmd[-1], encoding='utf-8') as f:
+                scripts.append(f.read())
+
+        with mock.patch.object(dns_backends, '_run', side_effect=run):
+            dns_backends.WindowsBackend().set_dns(adapter, servers)
+        return scripts[0]
+
+    def test_set_dns_script(self):
+        script = self.set_dns('以太网', ['1.1.1.1', ' 8.8.8.8'])
+        self.assertIn('name="以太网" source=static address=1.1.1.1 register=primary', script)
+        self.assertIn('address=8.8.8.8 index=2', script)
+        self.assertIn('source=dhcp', self.set_dns('以太网', []))
+
+    def test_set_dns_rejects_injection(self):
+        for adapter, servers in (('以太网', ['8.8.8.8 index=1']),
+                                 ('以太网', ['x validate=yes']),
+                                 ('以太网', ['8.8.8.8:53']),
+                                 ('a" source=dhcp', ['8.8.8.8']),
+                                 ('a\ninterface ipv4 reset', ['8.8.8.8'])):
+            with mock.patch.object(dns_backends, '_run') as run:
+                with self.assertRaises(dns_backends.DNSBackendError):
+                    dns_backends.WindowsBackend().set_dns(adapter, servers)
+                run.assert_not_called()
+
+
+class LinuxBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.resolv_conf = os.path.join(self.tmp.name, 'resolv.conf')
+        with open(self.resolv_conf, 'w', encoding='utf-8') as f:
+            f.write('nameserver 192.168.1.1\nsearch lan\n')
+        os.chmod(self.resolv_conf, 0o644)
+        self.sys_net = os.path.join(self.tmp.name, 'net')
+        for name, state in (('lo', 'unknown'), ('eth0', 'up'), ('wlan0', 'down'), ('docker0', 'up')):
+            os.makedirs(os.path.join(self.sys_net, name))
+            with open(os.path.join(self.sys_net, name, 'operstate'), 'w') as f:
+                f.write(state + '\n')
+        self.backend = dns_backends.LinuxBackend(self.resolv_conf, self.sys_net, use_resolved=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_list_adapters_only_up(self):
+        self.assertEqual(self.backend.list_adapters(), ['docker0', 'eth0'])
+
+    def test_set_dns_keeps_mode_and_restores(self):
+        self.assertEqual(self.backend.get_dns('eth0'), (SOURCE_DHCP, ['192.168.1.1']))
+
+        self.backend.set_dns('eth0', ['1.1.1.1', '8.8.8.8'])
+        self.assertEqual(stat.S_IMODE(os.stat(self.resolv_conf).st_mode), 0o644)
+        self.assertEqual(self.backend.get_dns('eth0'), (SOURCE_STATIC, ['1.1.1.1', '8.8.8.8']))
+        with open(self.resolv_conf, encoding='utf-8') as f:
+            self.assertIn('search lan', f.read())
+
+        self.backend.set_dns('eth0', [])
+        self.assertEqual(stat.S_IMODE(os.stat(self.resolv_conf).st_mode), 0o644)
+        self.assertEqual(self.backend.get_dns('eth0'), (SOURCE_DHCP, ['192.168.1.1']))
+        self.assertFalse(os.path.exists(self.backend.backup_path))
+
+    def test_symlinked_resolv_conf_stays_a_link(self):
+        # 模拟 /etc/resolv.conf -> /run/resolvconf/resolv.conf
+        run_dir = os.path.join(self.tmp.name, 'run')
+        os.makedirs(run_dir)
+        target = os.path.join(run_dir, 'resolv.conf')
+        os.replace(self.resolv_conf, target)
+        os.symlink(target, self.resolv_conf)
+
+        self.backend.set_dns('eth0', ['1.1.1.1'])
+        self.assertTrue(os.path.islink(self.resolv_conf))
+        self.assertEqual(os.readlink(self.resolv_conf), target)
+        self.assertEqual(self.backend.get_dns('eth0'), (SOURCE_STATIC, ['1.1.1.1']))
+        self.assertEqual(stat.S_IMODE(os.stat(target).st_mode), 0o644)
+
+        self.backend.set_dns('eth0', [])
+        self.assertTrue(os.path.islink(self.resolv_conf))
+        with open(target, encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'nameserver 192.168.1.1\nsearch lan\n')
+        self.assertEqual(os.listdir(run_dir), ['resolv.conf'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import dns_bench
+from dns_stub import StubDNSServer
+
+DOMAINS = ['a.example', 'b.example']
+
+
+class HelpersTest(unittest.TestCase):
+    def test_build_query(self):
+        packet = dns_bench.build_query('www.example.com', 0x1234)
+        self.assertEqual(packet[:2], b'\x12\x34')
+        self.assertIn(b'\x03www\x07example\x03com\x00', packet)
+
+    def test_parse_server(self):
+        self.assertEqual(dns_bench.parse_server('8.8.8.8'), ('8.8.8.8', 53))
+        self.assertEqual(dns_bench.parse_server('127.0.0.1:5353'), ('127.0.0.1', 5353))
+
+    def test_percentile(self):
+        values = [10, 20, 30, 40, 50]
+        self.assertEqual(dns_bench.percentile(values, 50), 30)
+        self.assertAlmostEqual(dns_bench.percentile(values, 95), 48)
+        self.assertIsNone(dns_bench.percentile([], 50))
+
+
+class BenchmarkTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.slow = await StubDNSServer(delay=0.06).start()
+        self.fast = await StubDNSServer(delay=0.0).start()
+        self.medium = await StubDNSServer(delay=0.03).start()
+        self.servfail = await StubDNSServer(rcode=2).start()
+        self.dead = await StubDNSServer(drop=True).start()
+        self.nxdomain = await StubDNSServer(rcode=3, delay=0.01).start()
+        self.servers = [self.slow, self.fast, self.medium, self.servfail, self.dead, self.nxdomain]
+
+    async def asyncTearDown(self):
+        for server in self.servers:
+            server.close()
+
+    async def test_ranking_and_best_two(self):
+        stats = await dns_bench.benchmark_async(
+            [s.address for s in self.servers], DOMAINS, repeat=3, timeout=0.3
+        )
+        for server in self.servers:
+            self.assertEqual(server.queries, 6)
+            self.assertEqual(stats[server.address].total, 6)
+
+        ranked = [s.server for s in dns_bench.rank(stats)]
+        # NXDOMAIN 是正常应答，参与延迟排名
+        self.assertEqual(ranked[:4], [self.fast.address, self.nxdomain.address,
+                                      self.medium.address, self.slow.address])
+        self.assertEqual(set(ranked[4:]), {self.servfail.address, self.dead.address})
+        self.assertEqual(dns_bench.best_two(stats), (self.fast.address, self.nxdomain.address))
+
+        self.assertEqual(stats[self.dead.address].timeouts, 6)
+        self.assertEqual(stats[self.dead.address].failure_rate, 1.0)
+        self.assertEqual(stats[self.servfail.address].failures, 6)
+        self.assertEqual(stats[self.fast.address].failure_rate, 0.0)
+        self.assertGreaterEqual(stats[self.slow.address].p50, 60)
+        self.assertLessEqual(stats[self.slow.address].p50, stats[self.slow.address].p99)
+
+    async def test_rounds_run_one_after_another(self):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        stats = await dns_bench.benchmark_async([self.slow.address], DOMAINS, repeat=3, timeout=0.3)
+        # 同一轮内的两个域名并发，三轮依次进行：至少 3 个应答延迟
+        self.assertGreaterEqual(loop.time() - start, 0.18)
+        self.assertEqual(len(stats[self.slow.address].latencies), 6)
+
+    async def test_best_two_when_nothing_answers(self):
+        stats = await dns_bench.benchmark_async([self.dead.address], DOMAINS, repeat=1, timeout=0.1)
+        self.assertEqual(dns_bench.best_two(stats), (None, None))
+        self.assertIn(self.dead.address, dns_bench.format_report(stats))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import dns_bench
+import dns_forwarder
+from dns_stub import StubDNSServer
+
+
+def rcode(response):
+    return response[3] & 0x0F
+
+
+def min_ttl(response):
+    return dns_forwarder.parse_ttls(response)[1]
+
+
+class ForwarderTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.clock = mock.Mock(return_value=1000.0)  # 可手动拨动的时钟
+        self.servers = []
+        self.forwarder = None
+
+    async def asyncTearDown(self):
+        if self.forwarder is not None:
+            self.forwarder.close()
+        for server in self.servers:
+            server.close()
+
+    async def stub(self, **kwargs):
+        server = await StubDNSServer(**kwargs).start()
+        self.servers.append(server)
+        return server
+
+    async def start(self, upstreams, max_size=100, timeout=0.3):
+        cache = dns_forwarder.DNSCache(max_size=max_size, negative_ttl=60, clock=self.clock)
+        self.forwarder = dns_forwarder.DNSForwarder(
+            [s.address for s in upstreams], port=0, cache=cache, timeout=timeout
+        )
+        await self.forwarder.start()
+        return f"127.0.0.1:{self.forwarder.port}"
+
+    async def ask(self, address, domain, qid=1, tcp=False):
+        exchange = dns_bench.exchange_tcp if tcp else dns_bench.exchange
+        _, response = await exchange(address, dns_bench.build_query(domain, qid), 1.0)
+        return response
+
+    async def test_hit_after_miss(self):
+        upstream = await self.stub(ttl=300)
+        address = await self.start([upstream])
+
+        first = await self.ask(address, 'a.example', qid=1)
+        second = await self.ask(address, 'A.example', qid=2)
+        self.assertEqual(rcode(first), 0)
+        self.assertEqual(second[:2], b'\x00\x02')
+        self.assertEqual(upstream.queries, 1)
+        self.assertEqual((self.forwarder.stats.hits, self.forwarder.stats.misses), (1, 1))
+
+    async def test_ttl_decrements_and_expires(self):
+        upstream = await self.stub(ttl=300)
+        address = await self.start([upstream])
+
+        await self.ask(address, 'a.example')
+        self.clock.return_value += 100
+        self.assertEqual(min_ttl(await self.ask(address, 'a.example')), 200)
+        self.assertEqual(upstream.queries, 1)
+
+        self.clock.return_value += 200
+        self.assertEqual(min_ttl(await self.ask(address, 'a.example')), 300)
+        self.assertEqual(upstream.queries, 2)
+
+    async def test_negative_caching_uses_soa_minimum(self):
+        upstream = await self.stub(rcode=3, negative_ttl=30)
+        address = await self.start([upstream])
+
+        self.assertEqual(rcode(await self.ask(address, 'nx.example')), 3)
+        self.assertEqual(rcode(await self.ask(address, 'nx.example')), 3)
+        self.assertEqual(upstream.queries, 1)
+
+        self.clock.return_value += 31
+        await self.ask(address, 'nx.example')
+        self.assertEqual(upstream.queries, 2)
+
+    async def test_servfail_when_all_upstreams_fail(self):
+        broken = await self.stub(rcode=2)
+        dead = await self.stub(drop=True)
+        address = await self.start([broken, dead], timeout=0.2)
+
+        response = await self.ask(address, 'a.example', qid=7)
+        self.assertEqual(response[:2], b'\x00\x07')
+        self.assertEqual(rcode(response), 2)
+        self.assertEqual(self.forwarder.stats.failures, 1)
+        self.assertEqual(len(self.forwarder.cache), 0)
+
+    async def test_first_upstream_answer_wins(self):
+        slow = await self.stub(delay=0.5, answer='9.9.9.9')
+        fast = await self.stub(delay=0.0, answer='1.1.1.1')
+        address = await self.start([slow, fast], timeout=1.0)
+
+        response = await self.ask(address, 'a.example')
+        self.assertTrue(response.endswith(bytes([1, 1, 1, 1])))
+        self.assertLess(self.forwarder.stats.latencies[0], 500)
+
+    async def test_mismatched_question_is_dropped(self):
+        spoofed = await self.stub(wrong_question=True, answer='6.6.6.6')
+        honest = await self.stub(delay=0.05, answer='1.1.1.1')
+        address = await self.start([spoofed, honest])
+
+        response = await self.ask(address, 'a.example')
+        self.assertTrue(response.endswith(bytes([1, 1, 1, 1])))
+        self.assertTrue(self.forwarder.cache.get(
+            dns_forwarder.parse_question(response)[0], 1).endswith(bytes([1, 1, 1, 1])))
+
+    async def test_only_mismatched_replies_give_servfail(self):
+        spoofed = await self.stub(wrong_question=True, tcp=True)
+        address = await self.start([spoofed], timeout=0.2)
+
+        self.assertEqual(rcode(await self.ask(address, 'a.example')), 2)
+        self.assertEqual(rcode(await self.ask(address, 'a.example', tcp=True)), 2)
+        self.assertEqual(len(self.forwarder.cache), 0)
+
+    async def test_lru_eviction(self):
+        upstream = await self.stub()
+        address = await self.start([upstream], max_size=2)
+
+        for domain in ('a.example', 'b.example', 'a.example', 'c.example'):
+            await self.ask(address, domain)
+        self.assertEqual(len(self.forwarder.cache), 2)
+        # b 最久未使用，已被淘汰；a 仍在缓存中
+        await self.ask(address, 'a.example')
+        self.assertEqual(upstream.queries, 3)
+        await self.ask(address, 'b.example')
+        self.assertEqual(upstream.queries, 4)
+
+    async def test_truncated_reply_not_cached_and_tcp_retry(self):
+        upstream = await self.stub(truncated=True, tcp=True)
+        address = await self.start([upstream])
+
+        response = await self.ask(address, 'big.example')
+        self.assertTrue(response[2] & dns_forwarder.FLAG_TC)
+        self.assertEqual(len(self.forwarder.cache), 0)
+
+        response = await self.ask(address, 'big.example', tcp=True)
+        self.assertFalse(response[2] & dns_forwarder.FLAG_TC)
+        self.assertEqual(rcode(response), 0)
+        self.assertEqual(upstream.tcp_queries, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
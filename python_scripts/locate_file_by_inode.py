@@ -1,26 +1,17 @@
 import os
-import io
 import sys
-import platform
 
-def change_default_encoding():
-    """判断是否在 windows git-bash 下运行，是则使用 utf-8 编码"""
-    if platform.system() == 'Windows':
-        terminal = os.environ.get('TERM')
-        if terminal and 'xterm' in terminal:
-            sys.stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
-            sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+from tree_walker import walk, change_default_encoding
 
 def find_file_by_inode(target_inode, search_path="./"):
-    for root, dirs, files in os.walk(search_path):
-        for name in files + dirs:
-            path = os.path.join(root, name)
-            try:
-                inode = os.stat(path).st_ino
-                if inode == target_inode:
-                    return path
-            except FileNotFoundError:
-                continue  # 处理符号链接失效等情况
+    for entry in walk(search_path):
+        try:
+            # entry.inode() 是符号链接自身的 inode，符号链接按其目标匹配（与 os.stat 一致）
+            inode = entry.stat().st_ino if entry.is_symlink() else entry.inode()
+            if inode == target_inode:
+                return entry.path
+        except OSError:
+            continue  # 处理符号链接失效等情况
     return None
 
 # 使用示例
@@ -3,13 +3,14 @@ import os
 import subprocess
 import sys
 import platform
-import io
 from pprint import pprint
 
 import signal
 import threading
 from concurrent.futures import ThreadPoolExecutor
 
+from tree_walker import change_default_encoding
+
 # 全局变量跟踪子进程
 processes = []
 processes_lock = threading.Lock()
@@ -94,16 +95,6 @@ def new_run_rsync(src_dir, target_root):
                 processes.remove(proc)
 
 
-def change_default_encoding():
-    """判断是否在 windows git-bash 下运行，是则使用 utf-8 编码"""
-    if platform.system() == 'Windows':
-        terminal = os.environ.get('TERM')
-        if terminal and 'xterm' in terminal:
-            sys.stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
-            sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-
-
-
 def unix_to_windows_path(unix_path: str, keep_case: bool = False) -> str:
     """
     将类Unix路径（如 /q/dell/c/pdi6）转换为Windows盘符路径（如 q:/dell/c/pdi6）
@@ -0,0 +1,104 @@
+import configparser
+import os
+import stat
+import tempfile
+
+_UNSET = object()  # 未传入 fallback 时与 configparser 一致：缺少选项即抛出异常
+
+DEFAULTS = {
+    'shutdown': {
+        'time': '23:00:00',
+        'enabled': 'true',
+    },
+}
+
+
+def copy_file_mode(src, dst, default=0o644):
+    """把 src 的权限（和属主）复制到 dst；src 不存在时使用 default
+
+    mkstemp 创建的临时文件权限为 0600，直接替换会让原文件变成只有自己可读。
+    """
+    try:
+        st = os.stat(src)
+    except FileNotFoundError:
+        os.chmod(dst, default)
+        return
+    os.chmod(dst, stat.S_IMODE(st.st_mode))
+    if hasattr(os, 'chown'):
+        try:
+            os.chown(dst, st.st_uid, st.st_gid)
+        except PermissionError:
+            pass  # 非 root 无法改属主，保持为当前用户
+
+
+class ConfigStore:
+    """只读取一次的 ini 配置，修改保存在内存中
+
+    自动识别 utf-8 / gb2312 编码；只有内容确实变化时才写回文件，
+    写入时先写临时文件再替换，避免中途退出导致配置文件损坏。
+    """
+
+    ENCODINGS = ['utf-8', 'gb2312']
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.cp, self.encoding = self._load()
+        # 确保配置文件包含所需的所有选项
+        changed = False
+        for section, options in DEFAULTS.items():
+            if not self.cp.has_section(section):
+                self.cp.add_section(section)
+                changed = True
+            for option, value in options.items():
+                if not self.cp.has_option(section, option):
+                    self.cp.set(section, option, value)
+                    changed = True
+        if changed:
+            self.save()
+
+    def _load(self):
+        for enc in self.ENCODINGS:
+            try:
+                with open(self.filename, 'r', encoding=enc) as f:
+                    cp = configparser.ConfigParser()
+                    cp.read_file(f)
+                    return cp, enc
+            except Exception:
+                continue
+        raise Exception('无法读取配置文件，请检查编码格式。')
+
+    def get(self, section, option, fallback=_UNSET):
+        if fallback is _UNSET:
+            return self.cp.get(section, option)
+        return self.cp.get(section, option, fallback=fallback)
+
+    def getboolean(self, section, option, fallback=_UNSET):
+        if fallback is _UNSET:
+            return self.cp.getboolean(section, option)
+        return self.cp.getboolean(section, option, fallback=fallback)
+
+    def sections(self):
+        return self.cp.sections()
+
+    def set(self, section, option, value):
+        """修改配置项，值有变化时立即保存；返回是否发生了变化"""
+        if self.cp.get(section, option, fallback=None) == value:
+            return False
+        if not self.cp.has_section(section):
+            self.cp.add_section(section)
+        self.cp.set(section, option, value)
+        self.save()
+        return True
+
+    def save(self):
+        """原子地写回配置文件"""
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.config-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding=self.encoding) as f:
+                self.cp.write(f)
+            copy_file_mode(self.filename, tmp_path)
+            os.replace(tmp_path, self.filename)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
@@ -0,0 +1,148 @@
+import heapq
+import threading
+from datetime import datetime, timedelta
+
+DAILY = 'daily'
+WEEKDAYS = 'weekdays'
+ONCE = 'once'
+
+
+class Schedule:
+    """一个命名的定时计划
+
+    kind 为 daily（每天）、weekdays（周一至周五）或 once（仅一次）。
+    daily/weekdays 使用 at 的时分秒（datetime.time），once 使用完整的 datetime。
+    """
+
+    def __init__(self, name, kind, at):
+        if kind not in (DAILY, WEEKDAYS, ONCE):
+            raise ValueError(f"未知的计划类型: {kind}")
+        self.name = name
+        self.kind = kind
+        self.at = at
+
+    def next_run(self, now):
+        """返回 now 之后（含 now）的下一次触发时间，没有则返回 None"""
+        if self.kind == ONCE:
+            return self.at if self.at >= now else None
+        run = datetime.combine(now.date(), self.at)
+        if run < now:
+            run += timedelta(days=1)
+        if self.kind == WEEKDAYS:
+            while run.weekday() >= 5:
+                run += timedelta(days=1)
+        return run
+
+    def __repr__(self):
+        return f"Schedule({self.name!r}, {self.kind!r}, {self.at!r})"
+
+
+class Scheduler:
+    """基于最小堆的事件驱动调度器
+
+    线程只在条件变量上等待到最近的触发时间；修改计划、启停和退出都会立即唤醒它，
+    不再需要轮询。clock 和 action 可注入，便于在非 Windows 平台测试。
+    """
+
+    # 单次等待的上限（秒），用于兜底系统休眠或手动修改系统时间造成的偏差
+    MAX_WAIT = 300
+    # 超过触发时间多少秒仍会执行；更晚（如休眠后醒来）视为错过，不再执行
+    GRACE = 60
+
+    def __init__(self, action, clock=datetime.now, enabled=True):
+        self._action = action
+        self._clock = clock
+        self._enabled = enabled
+        self._schedules = {}
+        self._heap = []
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def _rebuild(self):
+        """根据当前计划重建触发堆，调用方需持有锁"""
+        now = self._clock()
+        self._heap = []
+        for schedule in self._schedules.values():
+            run = schedule.next_run(now)
+            if run is not None:
+                self._heap.append((run, schedule.name))
+        heapq.heapify(self._heap)
+        self._cond.notify_all()
+
+    def set_schedule(self, schedule):
+        """添加或替换同名计划"""
+        with self._cond:
+            self._schedules[schedule.name] = schedule
+            self._rebuild()
+
+    def remove_schedule(self, name):
+        with self._cond:
+            self._schedules.pop(name, None)
+            self._rebuild()
+
+    def schedules(self):
+        with self._cond:
+            return list(self._schedules.values())
+
+    def set_enabled(self, enabled):
+        with self._cond:
+            self._enabled = enabled
+            self._rebuild()
+
+    def next_run(self):
+        """返回 (触发时间, 计划名)，没有待触发的计划时返回 None"""
+        with self._cond:
+            if not self._enabled or not self._heap:
+                return None
+            return self._heap[0]
+
+    def wake(self):
+        """立即唤醒调度线程重新计算（例如系统时间被修改后）"""
+        with self._cond:
+            self._rebuild()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def _due(self):
+        """等待直到有计划到期，返回到期的计划名；调度器停止时返回 None"""
+        with self._cond:
+            while not self._stopped:
+                if not self._enabled or not self._heap:
+                    self._cond.wait()
+                    continue
+                run, name = self._heap[0]
+                now = self._clock()
+                remaining = (run - now).total_seconds()
+                if remaining <= 0:
+                    heapq.heappop(self._heap)
+                    missed = -remaining > self.GRACE
+                    schedule = self._schedules.get(name)
+                    if schedule is not None:
+                        if schedule.kind == ONCE:
+                            del self._schedules[name]
+                        else:
+                            # 错过的计划从当前时间重新排期，不补执行
+                            start = now if missed else run + timedelta(seconds=1)
+                            heapq.heappush(self._heap, (schedule.next_run(start), name))
+                    if missed:
+                        continue
+                    return name
+                self._cond.wait(min(remaining, self.MAX_WAIT))
+            return None
+
+    def run(self):
+        """调度循环，直到 stop() 被调用"""
+        while True:
+            name = self._due()
+            if name is None:
+                return
+            self._action(name)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self._thread
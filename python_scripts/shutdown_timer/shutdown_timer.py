@@ -1,48 +1,33 @@
 import configparser
-import time
 import os
 import signal
-from datetime import datetime, timedelta
+from datetime import datetime
 import threading
-import pystray
-from pystray import MenuItem as item
-from PIL import Image, ImageDraw
-import tkinter as tk
-from tkinter import messagebox
+
+from config_store import ConfigStore
+from scheduler import Scheduler, Schedule, DAILY, ONCE
+
+# pystray、PIL 和 tkinter 导入较慢，放到函数内导入：import 本模块（测试、工具脚本）时不加载它们。
+# 托盘启动时 pystray 和 PIL 仍然需要导入，真正推迟到首次使用的只有 tkinter（设置对话框）。
 
 CONFIG_FILE = 'config.ini'
+SCHEDULE_PREFIX = 'schedule:'
 exit_event = threading.Event()  # 用于控制线程退出
+scheduler = None
 
 def signal_handler(signum, frame):
     print("\n正在退出程序...")
     exit_event.set()
+    if scheduler is not None:
+        scheduler.stop()
 
 # 注册信号处理
 signal.signal(signal.SIGINT, signal_handler)
 signal.signal(signal.SIGTERM, signal_handler)
 
-# 自动识别编码读取 ini 文件
+# 自动识别编码读取 ini 文件，只读取一次
 def read_config(filename):
-    encodings = ['utf-8', 'gb2312']
-    for enc in encodings:
-        try:
-            with open(filename, 'r', encoding=enc) as f:
-                cp = configparser.ConfigParser()
-                cp.read_file(f)
-                # 确保配置文件包含所需的所有选项
-                if not cp.has_section('shutdown'):
-                    cp.add_section('shutdown')
-                if not cp.has_option('shutdown', 'time'):
-                    cp.set('shutdown', 'time', '23:00:00')
-                if not cp.has_option('shutdown', 'enabled'):
-                    cp.set('shutdown', 'enabled', 'true')
-                # 保存更新后的配置
-                with open(filename, 'w', encoding=enc) as f:
-                    cp.write(f)
-                return cp, enc
-        except Exception:
-            continue
-    raise Exception('无法读取配置文件，请检查编码格式。')
+    return ConfigStore(filename)
 
 def get_shutdown_time(cp):
     time_str = cp.get('shutdown', 'time')
@@ -52,17 +37,38 @@ def get_shutdown_time(cp):
 def get_shutdown_enabled(cp):
     return cp.getboolean('shutdown', 'enabled', fallback=True)
 
-def set_shutdown_time(cp, enc, new_time):
+def get_schedules(cp):
+    """读取所有关机计划：[shutdown] 为每日计划，另可配置 [schedule:名称] 小节
+
+    [schedule:名称] 中 type 为 daily、weekdays 或 once，
+    time 为 HH:MM:SS（once 时为 YYYY-MM-DD HH:MM:SS）。
+    配置有误的小节会被跳过并打印警告，不影响托盘程序启动。
+    """
+    schedules = [Schedule('shutdown', DAILY, get_shutdown_time(cp))]
+    for section in cp.sections():
+        if not section.startswith(SCHEDULE_PREFIX):
+            continue
+        name = section[len(SCHEDULE_PREFIX):]
+        try:
+            kind = cp.get(section, 'type', fallback=DAILY)
+            time_str = cp.get(section, 'time')
+            if kind == ONCE:
+                at = datetime.strptime(time_str, '%Y-%m-%d %H:%M:%S')
+            else:
+                at = datetime.strptime(time_str, '%H:%M:%S').time()
+            schedules.append(Schedule(name, kind, at))
+        except (configparser.Error, ValueError) as e:
+            print(f'警告：忽略无效的关机计划 [{section}]：{e}')
+    return schedules
+
+def set_shutdown_time(cp, new_time):
     cp.set('shutdown', 'time', new_time)
-    with open(CONFIG_FILE, 'w', encoding=enc) as f:
-        cp.write(f)
 
-def set_shutdown_enabled(cp, enc, enabled):
+def set_shutdown_enabled(cp, enabled):
     cp.set('shutdown', 'enabled', str(enabled).lower())
-    with open(CONFIG_FILE, 'w', encoding=enc) as f:
-        cp.write(f)
 
 def create_image(enabled=True):
+    from PIL import Image, ImageDraw
     img = Image.new('RGB', (64, 64), color=(255, 255, 255))
     d = ImageDraw.Draw(img)
     if enabled:
@@ -75,13 +81,25 @@ def create_image(enabled=True):
         d.text((20, 20), '停', fill=(255, 255, 255))
     return img
 
-def show_config_dialog(icon, cp, enc, update_shutdown_time_callback):
+_icon_cache = {}
+
+def get_image(enabled=True):
+    """获取托盘图标，两种状态各只绘制一次"""
+    img = _icon_cache.get(enabled)
+    if img is None:
+        img = _icon_cache[enabled] = create_image(enabled)
+    return img
+
+def show_config_dialog(icon, cp, update_shutdown_time_callback):
+    import tkinter as tk
+    from tkinter import messagebox
+
     def on_ok():
         new_time = entry.get()
         try:
             # 验证时间格式
             datetime.strptime(new_time, '%H:%M:%S')
-            set_shutdown_time(cp, enc, new_time)
+            set_shutdown_time(cp, new_time)
             update_shutdown_time_callback(new_time)
             messagebox.showinfo('成功', '关机时间已更新！')
             root.destroy()
@@ -99,81 +117,66 @@ def show_config_dialog(icon, cp, enc, update_shutdown_time_callback):
     tk.Button(root, text='确定', command=on_ok).pack(pady=5)
     root.mainloop()
 
-def shutdown_watcher(shutdown_t):
-    cp, enc = read_config(CONFIG_FILE)
-    while not exit_event.is_set():
-        # 检查是否启用
-        if not get_shutdown_enabled(cp):
-            time.sleep(10)  # 如果未启用，每10秒检查一次状态
-            continue
-
-        now = datetime.now()
-        today_shutdown = datetime.combine(now.date(), shutdown_t[0])
-        if now >= today_shutdown:
-            # 如果已过关机时间，则等到明天
-            today_shutdown += timedelta(days=1)
-        wait_seconds = (today_shutdown - now).total_seconds()
-        if wait_seconds > 0:
-            # 使用更小的sleep间隔，以便能及时响应退出信号
-            for _ in range(int(min(wait_seconds, 10) * 2)):
-                if exit_event.is_set():
-                    return
-                time.sleep(0.5)
-        else:
-            print('到达关机时间，正在关机...')
-            os.system('shutdown /s /t 0')
-            break
+def do_shutdown(name):
+    print(f'到达关机时间（{name}），正在关机...')
+    os.system('shutdown /s /t 0')
 
 def main():
-    cp, enc = read_config(CONFIG_FILE)
+    global scheduler
+    import pystray
+    from pystray import MenuItem as item
+
+    cp = read_config(CONFIG_FILE)
     shutdown_time = [cp.get('shutdown', 'time')]
-    shutdown_t = [get_shutdown_time(cp)]
     enabled = [get_shutdown_enabled(cp)]
 
+    # 关机调度器：只在下一次触发时间或配置变化时唤醒
+    scheduler = Scheduler(do_shutdown, enabled=enabled[0])
+    for schedule in get_schedules(cp):
+        scheduler.set_schedule(schedule)
+
     def update_shutdown_time(new_time):
         shutdown_time[0] = new_time
-        shutdown_t[0] = datetime.strptime(new_time, '%H:%M:%S').time()
+        at = datetime.strptime(new_time, '%H:%M:%S').time()
+        scheduler.set_schedule(Schedule('shutdown', DAILY, at))
+        icon.title = get_tooltip()
 
     def toggle_enabled(icon, item):
         enabled[0] = not enabled[0]
-        set_shutdown_enabled(cp, enc, enabled[0])
-        icon.icon = create_image(enabled[0])
+        set_shutdown_enabled(cp, enabled[0])
+        scheduler.set_enabled(enabled[0])
+        icon.icon = get_image(enabled[0])
         icon.title = get_tooltip()  # 立即更新提示信息
 
     def on_click(icon, item=None):
-        show_config_dialog(icon, cp, enc, update_shutdown_time)
+        show_config_dialog(icon, cp, update_shutdown_time)
 
     def get_tooltip():
         status = "✅ 已激活" if enabled[0] else "⭕ 已停用"
         return f'⏰ 定时关机\n━━━━━━━━\n{status}\n⏱ 设定时间: {shutdown_time[0]}'
 
-    # 启动关机监控线程
-    shutdown_thread = threading.Thread(target=shutdown_watcher, args=(shutdown_t,), daemon=True)
-    shutdown_thread.start()
+    # 启动关机调度线程
+    scheduler.start()
 
     # 创建托盘图标（在主线程中运行）
+    # 预先绘制两种状态的图标，切换时直接复用
+    get_image(True)
+    get_image(False)
     icon = pystray.Icon('ShutdownTimer')
-    icon.icon = create_image(enabled[0])
+    icon.icon = get_image(enabled[0])
     icon.title = get_tooltip()  # 确保初始提示信息正确
     icon.menu = pystray.Menu(
-        item('设置关机时间', lambda icon, item: show_config_dialog(icon, cp, enc, update_shutdown_time)),
+        item('设置关机时间', lambda icon, item: show_config_dialog(icon, cp, update_shutdown_time)),
         item('激活/停用', toggle_enabled, checked=lambda item: enabled[0]),
         item('退出', lambda icon, item: icon.stop())
     )
 
-    def update_tooltip():
-        while icon.visible and not exit_event.is_set():
-            icon.title = get_tooltip()  # 使用最新的enabled状态
-            time.sleep(2)
-
-    tooltip_thread = threading.Thread(target=update_tooltip, daemon=True)
-    tooltip_thread.start()
-
     icon._on_click = on_click
     try:
         icon.run()
     finally:
         exit_event.set()  # 确保在托盘图标关闭时，所有线程都能正确退出
+        scheduler.stop()
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
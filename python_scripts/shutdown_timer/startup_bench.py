@@ -0,0 +1,117 @@
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# 与 main() 进入 icon.run() 之前相同的步骤：读配置、导入 pystray、用 PIL 绘制两种图标
+STARTUP_CODE = """
+import sys
+import shutdown_timer
+import pystray
+cp = shutdown_timer.read_config(sys.argv[1])
+shutdown_timer.get_schedules(cp)
+shutdown_timer.get_image(True)
+shutdown_timer.get_image(False)
+"""
+
+
+def run_code(code, repeat, args=()):
+    """在新进程中执行代码，返回最短耗时（秒）"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code] + list(args), cwd=HERE, check=True,
+                       stderr=subprocess.PIPE)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure_import(module, repeat):
+    """在新进程中导入模块，返回最短耗时（秒）"""
+    return run_code(f'import {module}', repeat)
+
+
+def import_cost(code, top, args=()):
+    """用 -X importtime 统计各模块的累计导入耗时（微秒），返回耗时最多的 top 个"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code] + list(args),
+        cwd=HERE, check=True, stderr=subprocess.PIPE, text=True
+    )
+    costs = []
+    for line in result.stderr.splitlines():
+        m = re.match(r'import time:\s+\d+\s+\|\s+(\d+)\s+\|\s+(.*)$', line)
+        if m:
+            costs.append((int(m.group(1)), m.group(2).strip()))
+    costs.sort(reverse=True)
+    return costs[:top]
+
+
+def copy_config(tmpdir):
+    path = os.path.join(tmpdir, 'config.ini')
+    shutil.copy(os.path.join(HERE, 'config.ini'), path)
+    return path
+
+
+def measure_config(repeat):
+    """加载配置并修改一次相同的值，返回平均耗时（秒）"""
+    sys.path.insert(0, HERE)
+    from config_store import ConfigStore
+
+    tmpdir = tempfile.mkdtemp(prefix='shutdown_timer_bench_')
+    try:
+        path = copy_config(tmpdir)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            store = ConfigStore(path)
+            store.set('shutdown', 'enabled', store.get('shutdown', 'enabled'))
+        return (time.perf_counter() - start) / repeat
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure shutdown_timer startup and import cost',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Runs per measurement')
+    parser.add_argument('-t', '--top', type=int, default=10, help='Slowest imports to list')
+    args = parser.parse_args()
+
+    baseline = measure_import('os', args.repeat)
+    imported = measure_import('shutdown_timer', args.repeat)
+    print(f"interpreter startup:        {baseline * 1000:8.1f} ms")
+    print(f"import shutdown_timer:      {imported * 1000:8.1f} ms "
+          f"(+{(imported - baseline) * 1000:.1f} ms, module only)")
+    print(f"load + unchanged set:       {measure_config(args.repeat * 20) * 1000:8.3f} ms")
+
+    # 真正的启动路径：pystray 和 PIL 在托盘启动前就要导入，只有 tkinter 被推迟
+    tmpdir = tempfile.mkdtemp(prefix='shutdown_timer_bench_')
+    try:
+        config = copy_config(tmpdir)
+        try:
+            startup = run_code(STARTUP_CODE, args.repeat, [config])
+        except subprocess.CalledProcessError as e:
+            reason = e.stderr.decode(errors='replace').strip().splitlines()[-1:]
+            print(f"\nskip startup path: {' '.join(reason)}")
+            print("\nslowest imports of the module (cumulative):")
+            costs = import_cost('import shutdown_timer', args.top)
+        else:
+            print(f"startup up to icon.run():   {startup * 1000:8.1f} ms "
+                  f"(+{(startup - baseline) * 1000:.1f} ms, config + pystray + PIL + icons)")
+            print("\nslowest imports on the startup path (cumulative):")
+            costs = import_cost(STARTUP_CODE, args.top, [config])
+    finally:
+        shutil.rmtree(tmpdir)
+    for cost, name in costs:
+        print(f"  {cost / 1000:8.1f} ms  {name}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, time as dtime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config_store import ConfigStore
+from scheduler import Scheduler, Schedule, DAILY, WEEKDAYS, ONCE
+import shutdown_timer
+
+FRIDAY_22 = datetime(2026, 10, 23, 22, 0, 0)
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class ScheduleTest(unittest.TestCase):
+    def test_daily_today_or_tomorrow(self):
+        s = Schedule('d', DAILY, dtime(23, 0))
+        self.assertEqual(s.next_run(FRIDAY_22), datetime(2026, 10, 23, 23, 0))
+        self.assertEqual(s.next_run(datetime(2026, 10, 23, 23, 0, 1)), datetime(2026, 10, 24, 23, 0))
+
+    def test_weekdays_skip_weekend(self):
+        s = Schedule('w', WEEKDAYS, dtime(7, 0))
+        # 周五 22:00 之后的下一个工作日是周一
+        self.assertEqual(s.next_run(FRIDAY_22), datetime(2026, 10, 26, 7, 0))
+        self.assertEqual(s.next_run(datetime(2026, 10, 22, 6, 0)), datetime(2026, 10, 22, 7, 0))
+
+    def test_once(self):
+        at = datetime(2026, 10, 23, 22, 30)
+        s = Schedule('o', ONCE, at)
+        self.assertEqual(s.next_run(FRIDAY_22), at)
+        self.assertIsNone(s.next_run(datetime(2026, 10, 23, 22, 31)))
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            Schedule('x', 'monthly', dtime(1, 0))
+
+
+class SchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock(FRIDAY_22)
+        self.fired = []
+        self.fired_event = threading.Event()
+        self.scheduler = Scheduler(self.action, clock=self.clock)
+        self.thread = None
+
+    def tearDown(self):
+        self.scheduler.stop()
+        if self.thread is not None:
+            self.thread.join(2)
+
+    def action(self, name):
+        self.fired.append((name, self.clock.now))
+        self.fired_event.set()
+
+    def start(self):
+        self.thread = self.scheduler.start()
+
+    def test_next_run_orders_schedules(self):
+        self.scheduler.set_schedule(Schedule('d', DAILY, dtime(23, 0)))
+        self.scheduler.set_schedule(Schedule('o', ONCE, datetime(2026, 10, 23, 22, 30)))
+        self.assertEqual(self.scheduler.next_run(), (datetime(2026, 10, 23, 22, 30), 'o'))
+
+    def test_set_schedule_wakes_waiting_thread(self):
+        self.start()
+        # 没有任何计划时线程无限期等待，添加一个已到期的计划应立即触发
+        self.scheduler.set_schedule(Schedule('o', ONCE, FRIDAY_22))
+        self.assertTrue(self.fired_event.wait(2))
+        self.assertEqual(self.fired, [('o', FRIDAY_22)])
+        self.assertEqual(self.scheduler.schedules(), [])
+
+    def test_daily_fires_and_reschedules(self):
+        self.scheduler.set_schedule(Schedule('d', DAILY, dtime(23, 0)))
+        self.start()
+        self.clock.now = datetime(2026, 10, 23, 23, 0)
+        self.scheduler.wake()
+        self.assertTrue(self.fired_event.wait(2))
+        self.assertEqual(self.fired, [('d', datetime(2026, 10, 23, 23, 0))])
+        self.assertEqual(self.scheduler.next_run(), (datetime(2026, 10, 24, 23, 0), 'd'))
+
+    def test_disabled_does_not_fire_until_enabled(self):
+        self.scheduler.set_enabled(False)
+        self.scheduler.set_schedule(Schedule('o', ONCE, datetime(2026, 10, 23, 22, 0, 30)))
+        self.start()
+        self.clock.now = datetime(2026, 10, 23, 22, 0, 30)
+        self.scheduler.wake()
+        self.assertFalse(self.fired_event.wait(0.2))
+        self.assertIsNone(self.scheduler.next_run())
+
+        self.scheduler.set_enabled(True)
+        self.assertTrue(self.fired_event.wait(2))
+        self.assertEqual(self.fired[0][0], 'o')
+
+    def test_stop_wakes_thread(self):
+        self.scheduler.set_schedule(Schedule('d', DAILY, dtime(23, 0)))
+        self.start()
+        start = time.monotonic()
+        self.scheduler.stop()
+        self.thread.join(2)
+        self.assertFalse(self.thread.is_alive())
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(self.fired, [])
+
+    def test_missed_deadline_after_suspend_is_skipped(self):
+        # 用很短的等待上限模拟休眠后依靠超时醒来（不经过 wake() 重建）
+        self.scheduler.MAX_WAIT = 0.05
+        self.scheduler.set_schedule(Schedule('d', DAILY, dtime(23, 0)))
+        self.start()
+        self.clock.now = datetime(2026, 10, 24, 8, 0)
+        self.assertFalse(self.fired_event.wait(0.5))
+        self.assertEqual(self.fired, [])
+        self.assertEqual(self.scheduler.next_run(), (datetime(2026, 10, 24, 23, 0), 'd'))
+
+    def test_deadline_within_grace_still_fires(self):
+        self.scheduler.MAX_WAIT = 0.05
+        self.scheduler.set_schedule(Schedule('d', DAILY, dtime(23, 0)))
+        self.start()
+        self.clock.now = datetime(2026, 10, 23, 23, 0, 30)
+        self.assertTrue(self.fired_event.wait(2))
+        self.assertEqual(self.fired[0][0], 'd')
+
+
+class GetSchedulesTest(unittest.TestCase):
+    def test_invalid_sections_are_skipped(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'config.ini')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('[shutdown]\ntime = 23:00:00\nenabled = true\n'
+                        '[schedule:ok]\ntype = weekdays\ntime = 07:00:00\n'
+                        '[schedule:no_time]\ntype = daily\n'
+                        '[schedule:bad_type]\ntype = monthly\ntime = 01:00:00\n'
+                        '[schedule:bad_time]\ntype = once\ntime = tomorrow\n')
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                schedules = shutdown_timer.get_schedules(ConfigStore(path))
+
+        self.assertEqual([(s.name, s.kind) for s in schedules],
+                         [('shutdown', DAILY), ('ok', WEEKDAYS)])
+        for name in ('no_time', 'bad_type', 'bad_time'):
+            self.assertIn(f'[schedule:{name}]', out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
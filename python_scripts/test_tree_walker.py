@@ -0,0 +1,93 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import tree_walker
+from tree_walker import walk
+
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'w').close()
+
+
+class WalkTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        for rel in ('a.txt', 'b.log', 'sub/c.txt', 'sub/deep/d.txt', 'skip/e.txt'):
+            touch(os.path.join(self.root, rel))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def rel(self, entries):
+        return sorted(os.path.relpath(entry.path, self.root) for entry in entries)
+
+    def test_walks_everything(self):
+        self.assertEqual(self.rel(walk(self.root)), [
+            'a.txt', 'b.log', 'skip', 'skip/e.txt', 'sub', 'sub/c.txt', 'sub/deep', 'sub/deep/d.txt'
+        ])
+
+    def test_include_and_exclude(self):
+        entries = walk(self.root, include=['*.txt'], exclude=['skip'], yield_dirs=False)
+        self.assertEqual(self.rel(entries), ['a.txt', 'sub/c.txt', 'sub/deep/d.txt'])
+
+    def test_parallel_matches_single_thread(self):
+        for jobs in (2, 8):
+            self.assertEqual(self.rel(walk(self.root, jobs=jobs)), self.rel(walk(self.root)))
+
+    def test_same_device_prunes_other_devices(self):
+        real_stat = os.stat
+
+        def fake_stat(path, *args, **kwargs):
+            # 让 root 看起来在另一个设备上，其下所有目录都算跨设备
+            st = real_stat(path, *args, **kwargs)
+            if path == self.root:
+                return os.stat_result((st.st_mode, st.st_ino, st.st_dev + 1) + tuple(st)[3:])
+            return st
+
+        with mock.patch.object(tree_walker.os, 'stat', fake_stat):
+            entries = list(walk(self.root, same_device=True))
+        # 跨设备的目录本身仍然输出，但不再深入
+        self.assertEqual(self.rel(entries), ['a.txt', 'b.log', 'skip', 'sub'])
+
+    def test_symlink_loop_is_visited_once(self):
+        os.symlink(self.root, os.path.join(self.root, 'sub', 'loop'))
+        for jobs in (1, 4):
+            entries = self.rel(walk(self.root, follow_symlinks=True, jobs=jobs))
+            self.assertEqual(entries.count('sub/deep/d.txt'), 1)
+            self.assertIn('sub/loop', entries)
+            self.assertFalse(any(path.startswith('sub/loop/') for path in entries))
+
+    def test_symlinks_not_followed_by_default(self):
+        os.symlink(os.path.join(self.root, 'sub'), os.path.join(self.root, 'link'))
+        entries = self.rel(walk(self.root))
+        self.assertIn('link', entries)
+        self.assertNotIn('link/c.txt', entries)
+
+    def test_onerror_on_missing_root(self):
+        missing = os.path.join(self.root, 'missing')
+        for kwargs in ({}, {'jobs': 4}, {'same_device': True}):
+            errors = []
+            self.assertEqual(list(walk(missing, onerror=errors.append, **kwargs)), [])
+            self.assertEqual(len(errors), 1)
+            self.assertIsInstance(errors[0], FileNotFoundError)
+
+    def test_early_close(self):
+        for jobs in (1, 4):
+            before = threading.active_count()
+            entries = walk(self.root, jobs=jobs)
+            next(entries)
+            entries.close()
+            self.assertEqual(list(entries), [])
+            self.assertLessEqual(threading.active_count(), before)
+
+
+if __name__ == '__main__':
+    unittest.main()
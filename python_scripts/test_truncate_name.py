@@ -0,0 +1,63 @@
+import ntpath
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from truncate_name import NameIndex, build_plan
+
+D = Path('dir')
+
+
+class NameIndexTest(unittest.TestCase):
+    def test_free_name_is_kept(self):
+        index = NameIndex()
+        index.seed(D, ['a.txt'])
+        self.assertEqual(index.claim(D / 'b.txt'), D / 'b.txt')
+
+    def test_suffix_assignment(self):
+        index = NameIndex()
+        index.seed(D, ['a.txt'])
+        self.assertEqual(index.claim(D / 'a.txt'), D / 'a_1.txt')
+        self.assertEqual(index.claim(D / 'a.txt'), D / 'a_2.txt')
+
+    def test_existing_suffixed_names_are_skipped(self):
+        index = NameIndex()
+        index.seed(D, ['a.txt', 'a_1.txt', 'a_2.txt'])
+        self.assertEqual(index.claim(D / 'a.txt'), D / 'a_3.txt')
+
+    def test_release_frees_name(self):
+        index = NameIndex()
+        index.seed(D, ['a.txt'])
+        index.release(D / 'a.txt')
+        self.assertEqual(index.claim(D / 'a.txt'), D / 'a.txt')
+
+    def test_case_insensitive_collision(self):
+        # Windows 的 normcase：大小写不同的文件名视为同一个
+        index = NameIndex(normcase=ntpath.normcase)
+        index.seed(D, ['ABC.txt'])
+        self.assertEqual(index.claim(D / 'abc.txt'), D / 'abc_1.txt')
+        self.assertEqual(index.claim(D / 'Abc.TXT'), D / 'Abc_2.TXT')
+        index.release(D / 'abc.TXT')
+        self.assertEqual(index.claim(D / 'aBc.txt'), D / 'aBc.txt')
+
+
+class BuildPlanTest(unittest.TestCase):
+    def test_long_names_get_unique_targets(self):
+        with tempfile.TemporaryDirectory() as root:
+            long_a = 'a' * 30 + '1.txt'
+            long_b = 'a' * 30 + '2.txt'
+            for name in (long_a, long_b, 'a' * 16 + '.txt'):
+                open(os.path.join(root, name), 'w').close()
+
+            plan = dict(build_plan(root, max_length=25, truncate_length=20))
+            self.assertEqual(set(plan), {os.path.join(root, long_a), os.path.join(root, long_b)})
+            self.assertEqual(sorted(os.path.basename(dst) for dst in plan.values()),
+                             ['a' * 16 + '_1.txt', 'a' * 16 + '_2.txt'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import io
+import sys
+import platform
+from fnmatch import fnmatch
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+def change_default_encoding():
+    """判断是否在 windows git-bash 下运行，是则使用 utf-8 编码"""
+    if platform.system() == 'Windows':
+        terminal = os.environ.get('TERM')
+        if terminal and 'xterm' in terminal:
+            sys.stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+            sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+
+def _match(name, patterns):
+    """文件名是否匹配任一通配符模式"""
+    return any(fnmatch(name, pattern) for pattern in patterns)
+
+
+def _scan(directory, options):
+    """扫描单个目录，返回 (要输出的 DirEntry 列表, 要继续遍历的子目录列表)
+
+    子目录列表中每项为 (路径, 目录标识)，目录标识在跟随符号链接时用于检测环路。
+    """
+    include, exclude, root_dev, follow_symlinks, onerror, yield_dirs = options
+    entries = []
+    subdirs = []
+    try:
+        it = os.scandir(directory)
+    except OSError as e:
+        if onerror is not None:
+            onerror(e)
+        return entries, subdirs
+
+    with it:
+        for entry in it:
+            name = entry.name
+            if exclude and _match(name, exclude):
+                continue
+            try:
+                is_dir = entry.is_dir(follow_symlinks=follow_symlinks)
+                key = None
+                if is_dir and (root_dev is not None or follow_symlinks):
+                    st = entry.stat(follow_symlinks=follow_symlinks)
+                    key = (st.st_dev, st.st_ino)
+            except OSError as e:
+                if onerror is not None:
+                    onerror(e)
+                continue
+
+            if is_dir:
+                # 跨设备的目录本身仍然输出，但不再深入（与 find -xdev 一致）
+                if root_dev is None or key[0] == root_dev:
+                    subdirs.append((entry.path, key))
+                if yield_dirs:
+                    entries.append(entry)
+            elif not include or _match(name, include):
+                entries.append(entry)
+    return entries, subdirs
+
+
+def walk(root, include=None, exclude=None, same_device=False,
+         follow_symlinks=False, onerror=None, jobs=1, yield_dirs=True):
+    """基于 os.scandir 递归遍历目录树，逐个产出 os.DirEntry
+
+    :param root: 起始目录（本身不输出）
+    :param include: 通配符列表，只输出匹配的文件（目录不受影响）
+    :param exclude: 通配符列表，匹配的文件和目录都会被跳过，目录不再深入
+    :param same_device: 为 True 时不进入与 root 不在同一设备上的目录
+    :param follow_symlinks: 是否跟随指向目录的符号链接（会检测环路）
+    :param onerror: 出错时以 OSError 调用的回调，默认忽略错误；
+        jobs > 1 时会在工作线程中被调用，回调需自行保证线程安全
+    :param jobs: 并行扫描的线程数，1 表示单线程深度优先遍历；
+        jobs > 1 时输出顺序不确定
+    :param yield_dirs: 是否输出目录条目
+    """
+    root = os.fspath(root)
+    root_dev = None
+    visited = set()
+    if same_device or follow_symlinks:
+        try:
+            st = os.stat(root)
+        except OSError as e:
+            if onerror is not None:
+                onerror(e)
+            return
+        if same_device:
+            root_dev = st.st_dev
+        visited.add((st.st_dev, st.st_ino))
+
+    options = (include, exclude, root_dev, follow_symlinks, onerror, yield_dirs)
+
+    def descend(subdirs):
+        """过滤已访问过的目录，返回需要扫描的路径"""
+        if not follow_symlinks:
+            return [path for path, _ in subdirs]
+        paths = []
+        for path, key in subdirs:
+            if key not in visited:
+                visited.add(key)
+                paths.append(path)
+        return paths
+
+    if jobs <= 1:
+        stack = [root]
+        while stack:
+            entries, subdirs = _scan(stack.pop(), options)
+            yield from entries
+            stack.extend(reversed(descend(subdirs)))
+        return
+
+    executor = ThreadPoolExecutor(max_workers=jobs)
+    try:
+        pending = {executor.submit(_scan, root, options)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                entries, subdirs = future.result()
+                for path in descend(subdirs):
+                    pending.add(executor.submit(_scan, path, options))
+                yield from entries
+    finally:
+        # 调用方提前结束迭代时，取消尚未开始的扫描
+        executor.shutdown(wait=True, cancel_futures=True)
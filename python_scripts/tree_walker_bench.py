@@ -0,0 +1,93 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from tree_walker import walk
+
+
+def make_tree(root, depth, fanout, files_per_dir):
+    """生成用于测试的目录树，返回创建的条目数"""
+    count = 0
+    level = [root]
+    for _ in range(depth):
+        next_level = []
+        for directory in level:
+            for i in range(files_per_dir):
+                open(os.path.join(directory, f"file_{i}.txt"), 'w').close()
+                count += 1
+            for i in range(fanout):
+                subdir = os.path.join(directory, f"dir_{i}")
+                os.mkdir(subdir)
+                next_level.append(subdir)
+                count += 1
+        level = next_level
+    return count
+
+
+def count_os_walk(root):
+    """os.walk + os.stat，与旧版 locate_file_by_inode 相同"""
+    count = 0
+    for top, dirs, files in os.walk(root):
+        for name in files + dirs:
+            os.stat(os.path.join(top, name))
+            count += 1
+    return count
+
+
+def count_rglob(root):
+    """Path.rglob + is_file/is_dir，与旧版 truncate_name 相同"""
+    count = 0
+    for path in Path(root).rglob('*'):
+        if path.is_file() or path.is_dir():
+            count += 1
+    return count
+
+
+def count_tree_walker(root, jobs):
+    count = 0
+    for entry in walk(root, jobs=jobs):
+        entry.is_dir(follow_symlinks=False)
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare tree_walker against os.walk and Path.rglob',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-d', '--depth', type=int, default=4, help='Tree depth')
+    parser.add_argument('-f', '--fanout', type=int, default=8, help='Subdirectories per directory')
+    parser.add_argument('-n', '--files', type=int, default=20, help='Files per directory')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Runs per method, best is reported')
+    parser.add_argument('-j', '--jobs', type=int, default=8, help='Threads for the parallel walker')
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='tree_walker_bench_')
+    try:
+        total = make_tree(root, args.depth, args.fanout, args.files)
+        print(f"Generated {total} entries in {root}")
+
+        methods = [
+            ('os.walk + stat', lambda: count_os_walk(root)),
+            ('Path.rglob', lambda: count_rglob(root)),
+            ('tree_walker (1 thread)', lambda: count_tree_walker(root, 1)),
+            (f'tree_walker ({args.jobs} threads)', lambda: count_tree_walker(root, args.jobs)),
+        ]
+        for name, func in methods:
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                count = func()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"{name:<26} {best * 1000:8.1f} ms  {count / best:10.0f} entries/s")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,7 @@
 import os
-import io
 import sys
-import platform
+
+from tree_walker import walk, change_default_encoding
 
 def get_filename_bytes(filename):
     """获取文件名的字节长度"""
@@ -18,16 +18,10 @@ def get_filename_bytes(filename):
     return len(byte_name)
 
 
-def change_default_encoding():
-    """判断是否在 windows git-bash 下运行，是则使用 utf-8 编码"""
-    if platform.system() == 'Windows':
-        terminal = os.environ.get('TERM')
-        if terminal and 'xterm' in terminal:
-            sys.stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
-            sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-
-
 import os
+import json
+import time
+import argparse
 from pathlib import Path
 
 def safe_truncate(filename, max_length=30):
@@ -43,45 +37,192 @@ def safe_truncate(filename, max_length=30):
     truncated_stem = stem[:available]
     return f"{truncated_stem}{suffix}"
 
-def make_unique(path):
-    """为重复文件名添加序号"""
-    counter = 1
-    while path.exists():
-        stem = path.stem.rstrip(f"_{counter-1}")
-        new_name = f"{stem}_{counter}{path.suffix}"
-        path = path.with_name(new_name)
-        counter += 1
-    return path
-
-def process_file(file_path, max_length=200):
-    """处理单个文件"""
-    #print(get_filename_bytes(file_path.name))
-    if get_filename_bytes(file_path.name) <= max_length:
-        return
-    
-    # 生成新文件名
-    new_name = safe_truncate(file_path.name, 20)
-    new_path = file_path.with_name(new_name)
-    
-    # 处理重名并重命名
-    new_path = make_unique(new_path)
-    try:
-        file_path.rename(new_path)
-        print(f"Origin Path: {file_path}")
-        print(f"Renamed: {file_path.name} -> {new_path.name}")
-        print()
-    except Exception as e:
-        print(f"Error renaming {file_path}: {str(e)}")
+class NameIndex:
+    """目录内已占用文件名的内存索引，每个目录只列出一次
+
+    文件名按 normcase 规范化后比较：Windows（NTFS）上不区分大小写。
+    """
+
+    def __init__(self, normcase=os.path.normcase):
+        self._normcase = normcase
+        self._names = {}     # 目录 -> 已占用文件名集合（规范化后）
+        self._counters = {}  # (目录, 规范化文件名) -> 下一个可尝试的序号
+
+    def names(self, directory):
+        """获取目录下已占用的文件名集合（规范化后）"""
+        names = self._names.get(directory)
+        if names is None:
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                names = []
+            self.seed(directory, names)
+            names = self._names[directory]
+        return names
+
+    def seed(self, directory, names):
+        """用扫描时已得到的目录列表初始化索引，避免再次列目录"""
+        self._names[directory] = {self._normcase(name) for name in names}
+
+    def claim(self, path):
+        """为 path 分配目录内唯一的文件名，并登记为已占用"""
+        directory = path.parent
+        names = self.names(directory)
+        normcase = self._normcase
+        name = path.name
+        if normcase(name) in names:
+            key = (directory, normcase(name))
+            counter = self._counters.get(key, 1)
+            stem, suffix = os.path.splitext(name)
+            while normcase(f"{stem}_{counter}{suffix}") in names:
+                counter += 1
+            self._counters[key] = counter + 1
+            name = f"{stem}_{counter}{suffix}"
+        names.add(normcase(name))
+        return path.with_name(name)
+
+    def release(self, path):
+        """登记 path 已不再占用其文件名"""
+        names = self._names.get(path.parent)
+        if names is not None:
+            names.discard(self._normcase(path.name))
+
+
+def make_unique(path, index):
+    """为重复文件名添加序号，index 为本次扫描使用的 NameIndex"""
+    return index.claim(path)
 
 def scan_directory(root_dir):
     """递归扫描目录"""
-    for path in Path(root_dir).rglob('*'):
-        if path.is_file():
-            process_file(path)
-        elif path.is_dir() and len(path.name) > 255:
-            print(f"Warning: Directory name too long: {path}")
+    plan = build_plan(root_dir)
+    apply_plan(plan)
+
+
+def build_plan(root_dir, max_length=200, truncate_length=20, jobs=1):
+    """扫描目录树，生成 [(原路径, 新路径), ...] 重命名计划，不修改文件系统
+
+    本地磁盘上单线程 scandir 最快；jobs > 1 只在网络文件系统等高延迟场景下才可能更快。
+    """
+    listings = {}  # 目录 -> (全部文件名, 子目录名集合)
+
+    def on_error(e):
+        print(f"Error scanning {e.filename}: {str(e)}")
+
+    for entry in walk(root_dir, onerror=on_error, jobs=jobs):
+        directory = os.path.dirname(entry.path)
+        names, subdirs = listings.setdefault(directory, ([], set()))
+        names.append(entry.name)
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+        except OSError:
+            continue
+        if is_dir:
+            subdirs.add(entry.name)
+            if get_filename_bytes(entry.name) > 255:
+                print(f"Warning: Directory name too long: {entry.path}")
+
+    index = NameIndex()
+    plan = []
+    for directory in sorted(listings):
+        names, subdirs = listings[directory]
+        index.seed(Path(directory), names)
+        for name in sorted(names):
+            if get_filename_bytes(name) <= max_length:
+                continue
+            if name in subdirs:
+                continue
+            src = os.path.join(directory, name)
+            new_path = make_unique(Path(directory, safe_truncate(name, truncate_length)), index)
+            index.release(Path(src))
+            plan.append((src, os.path.join(directory, new_path.name)))
+
+    # 深层路径优先，保证父目录改名不会使子路径失效
+    plan.sort(key=lambda item: item[0].count(os.sep), reverse=True)
+    return plan
+
+
+def write_plan(plan, file_path):
+    """将重命名计划写入文件（每行一条 JSON），便于预览和审核"""
+    with open(file_path, 'w', encoding='utf-8') as f:
+        for src, dst in plan:
+            f.write(json.dumps({'src': src, 'dst': dst}, ensure_ascii=False) + '\n')
+
+
+def read_plan(file_path):
+    """读取 write_plan 写出的重命名计划"""
+    plan = []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                item = json.loads(line)
+                plan.append((item['src'], item['dst']))
+    return plan
+
+
+def apply_plan(plan, report_every=1000):
+    """按计划批量重命名，定期输出进度和速度，返回成功数"""
+    total = len(plan)
+    success = 0
+    start = time.perf_counter()
+    for idx, (src, dst) in enumerate(plan, 1):
+        try:
+            if os.path.exists(dst):
+                raise FileExistsError(f"Target exists: {dst}")
+            os.rename(src, dst)
+            success += 1
+            print(f"Origin Path: {src}")
+            print(f"Renamed: {os.path.basename(src)} -> {os.path.basename(dst)}")
+            print()
+        except Exception as e:
+            print(f"Error renaming {src}: {str(e)}")
+        if idx % report_every == 0 or idx == total:
+            elapsed = time.perf_counter() - start
+            rate = idx / elapsed if elapsed > 0 else 0.0
+            print(f"Progress: {idx}/{total} ({rate:.0f} files/s)")
+            sys.stdout.flush()
+    return success
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Truncate file names whose byte length is too long',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('root', nargs='?', help='Root directory to scan')
+    parser.add_argument('-n', '--dry-run', action='store_true',
+                        help='Only build the rename plan, do not rename')
+    parser.add_argument('-o', '--plan-out', help='Write the rename plan to this file')
+    parser.add_argument('-a', '--apply-plan', help='Apply a previously written plan file')
+    parser.add_argument('-m', '--max-length', type=int, default=200,
+                        help='Maximum file name length in bytes')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Scan threads; only worth raising on high-latency (network) filesystems')
+    args = parser.parse_args()
+
+    if args.apply_plan:
+        plan = read_plan(args.apply_plan)
+    elif args.root:
+        start = time.perf_counter()
+        plan = build_plan(args.root, max_length=args.max_length, jobs=args.jobs)
+        print(f"Planned {len(plan)} renames in {time.perf_counter() - start:.2f}s")
+    else:
+        parser.error('root or --apply-plan is required')
+
+    if args.plan_out:
+        write_plan(plan, args.plan_out)
+        print(f"Plan written to {args.plan_out}")
+
+    if args.dry_run:
+        if not args.plan_out:
+            for src, dst in plan:
+                print(f"{src} -> {dst}")
+        return
+
+    success = apply_plan(plan)
+    print(f"Done! Success: {success}/{len(plan)}")
 
 
 if __name__ == "__main__":
     change_default_encoding()
-    scan_directory(sys.argv[1])
+    main()